@@ -1,10 +1,71 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from lxml import etree
+from io import BytesIO
 import pandas as pd
-from time import sleep
+from time import sleep, monotonic, time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import count
+import threading
+import sqlite3
+import zlib
+import argparse
+import re
+import logging
+from storageV3 import RAW_PAPERS, read_stage_table, write_stage_table, stage_table_exists
 
-def fetch_arxiv_papers(query, start=0, max_results=100):
-    base_url = 'http://export.arxiv.org/api/query?'
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+ARXIV_API_URL = 'http://export.arxiv.org/api/query?'
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+ARXIV_NS = '{http://arxiv.org/schemas/atom}'
+OPENSEARCH_NS = '{http://a9.com/-/spec/opensearch/1.1/}'
+
+SUBMITTED_DATE_FORMAT = '%Y%m%d%H%M'
+
+ARXIV_QUERY = 'all:semiconductor'
+HARVEST_CACHE_PATH = 'arxiv_harvest_cache.sqlite'
+
+# arXiv asks clients to start no more than one request every 3 seconds
+ARXIV_REQUESTS_PER_SECOND = 1 / 3
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how often requests may start."""
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            sleep(wait)
+
+def make_session(pool_size=4):
+    """Create a requests session with a pool of keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch_arxiv_papers(query, start=0, max_results=100, session=None,
+                       base_url=ARXIV_API_URL, timeout=30):
     params = {
         'search_query': query,
         'start': start,
@@ -13,44 +74,410 @@ def fetch_arxiv_papers(query, start=0, max_results=100):
         'sortOrder': 'descending'
     }
     
-    response = requests.get(base_url, params=params)
+    response = (session or requests).get(base_url, params=params, timeout=timeout)
+    response.raise_for_status()
     return response.content
 
+class EmptyPageError(requests.RequestException):
+    """The API returned no entries for a page inside the query's totalResults."""
+
+def _is_retryable(error):
+    """Retry on timeouts, dropped connections, empty pages and 5xx responses only."""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, EmptyPageError)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code >= 500
+
+def fetch_with_retry(query, start, max_results, session, rate_limiter,
+                     base_url=ARXIV_API_URL, max_retries=4, backoff=2.0, timeout=30):
+    """Fetch one page under the shared rate limit, backing off on transient errors."""
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire()
+        try:
+            xml_content = fetch_arxiv_papers(query, start, max_results, session, base_url, timeout)
+            # arXiv occasionally answers with an empty page mid-feed
+            if start < parse_total_results(xml_content) and next(iter_arxiv_entries(xml_content), None) is None:
+                raise EmptyPageError(f"no entries returned for start={start}")
+            return xml_content
+        except requests.RequestException as error:
+            if attempt == max_retries or not _is_retryable(error):
+                raise
+            delay = backoff * 2 ** attempt
+            retry_after = getattr(error.response, 'headers', {}).get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            logging.warning(f"Page start={start} failed ({error}); retrying in {delay:.1f}s")
+            sleep(delay)
+
+def harvest_pages(query, starts, batch_size=100, max_workers=4,
+                  requests_per_second=ARXIV_REQUESTS_PER_SECOND,
+                  base_url=ARXIV_API_URL, max_retries=4, backoff=2.0, timeout=30,
+                  rate_limiter=None, session=None):
+    """Fetch feed pages concurrently and yield (start, xml_content) in page order.
+
+    At most max_workers requests are in flight, and a shared token bucket
+    bounds how often new requests begin, so total time is governed by the
+    rate limit rather than by request latency. Pass a rate_limiter and
+    session to run several harvests under one request budget.
+    """
+    own_session = session is None
+    rate_limiter = rate_limiter or TokenBucket(requests_per_second)
+    session = session or make_session(pool_size=max_workers)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    remaining = iter(starts)
+
+    def submit_next():
+        start = next(remaining, None)
+        if start is not None:
+            pending.append((start, pool.submit(fetch_with_retry, query, start, batch_size,
+                                               session, rate_limiter, base_url,
+                                               max_retries, backoff, timeout)))
+
+    # Keep only max_workers pages in flight so a consumer that stops early
+    # (e.g. an incremental harvest) wastes at most that many requests
+    for _ in range(max_workers):
+        submit_next()
+    try:
+        while pending:
+            start, future = pending.popleft()
+            xml_content = future.result()
+            submit_next()
+            yield start, xml_content
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if own_session:
+            session.close()
+
+class HarvestCache:
+    """SQLite store of raw feed pages and per-query "last updated" watermarks.
+
+    Pages are keyed by (query, start, max_results) so an interrupted harvest
+    can resume from the pages it already finished. The watermark is the
+    newest `updated` timestamp of the last completed harvest; pages fetched
+    before that harvest completed are stale, since later updates shift the
+    offsets of every entry.
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                query TEXT, start INTEGER, max_results INTEGER,
+                fetched_at REAL, content BLOB,
+                PRIMARY KEY (query, start, max_results)
+            );
+            CREATE TABLE IF NOT EXISTS watermarks (
+                query TEXT PRIMARY KEY, last_updated TEXT, completed_at REAL
+            );
+        """)
+
+    def cached_starts(self, query, max_results):
+        """Starts of pages fetched since the last completed harvest of this query."""
+        row = self.conn.execute(
+            "SELECT completed_at FROM watermarks WHERE query = ?", (query,)).fetchone()
+        rows = self.conn.execute(
+            "SELECT start FROM pages WHERE query = ? AND max_results = ? AND fetched_at > ?",
+            (query, max_results, row[0] if row else 0))
+        return {start for (start,) in rows}
+
+    def get_page(self, query, start, max_results):
+        row = self.conn.execute(
+            "SELECT content FROM pages WHERE query = ? AND start = ? AND max_results = ?",
+            (query, start, max_results)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def put_page(self, query, start, max_results, content):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (query, start, max_results, fetched_at, content) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (query, start, max_results, time(), zlib.compress(content)))
+
+    def get_watermark(self, query):
+        row = self.conn.execute(
+            "SELECT last_updated FROM watermarks WHERE query = ?", (query,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, query, last_updated):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watermarks (query, last_updated, completed_at) "
+                "VALUES (?, ?, ?)",
+                (query, last_updated, time()))
+
+    def iter_pages(self):
+        """Yield the content of every cached page, e.g. for parser benchmarks."""
+        for (content,) in self.conn.execute("SELECT content FROM pages"):
+            yield zlib.decompress(content)
+
+    def close(self):
+        self.conn.close()
+
+def harvest_with_cache(query, starts, batch_size, cache, **harvest_options):
+    """Yield (start, xml_content) in page order, fetching only pages missing from the cache.
+
+    Each fetched page is stored as soon as it is consumed, so a crashed
+    harvest resumes after its last finished page.
+    """
+    starts = list(starts)
+    cached = cache.cached_starts(query, batch_size)
+    missing = [start for start in starts if start not in cached]
+    if len(missing) < len(starts):
+        logging.info(f"Resuming harvest: {len(starts) - len(missing)} of {len(starts)} pages cached")
+    fetched = harvest_pages(query, missing, batch_size, **harvest_options)
+    try:
+        for start in starts:
+            if start in cached:
+                yield start, cache.get_page(query, start, batch_size)
+            else:
+                _, xml_content = next(fetched)
+                cache.put_page(query, start, batch_size, xml_content)
+                yield start, xml_content
+    finally:
+        fetched.close()
+
+def _arxiv_id(entry_id):
+    """Strip the abs URL prefix and version suffix from an entry id."""
+    return re.sub(r'v\d+$', '', entry_id.strip().rsplit('/abs/', 1)[-1])
+
+def iter_arxiv_entries(xml_content):
+    """Stream paper dicts from an Atom feed page, freeing each entry once parsed."""
+    entries = etree.iterparse(BytesIO(xml_content), events=('end',), tag=ATOM_NS + 'entry')
+    for _, entry in entries:
+        primary = entry.find(ARXIV_NS + 'primary_category')
+        paper = {}
+        paper['arxiv_id'] = _arxiv_id(entry.findtext(ATOM_NS + 'id', ''))
+        paper['updated'] = entry.findtext(ATOM_NS + 'updated', '').strip()
+        paper['title'] = entry.findtext(ATOM_NS + 'title', '').strip()
+        paper['abstract'] = entry.findtext(ATOM_NS + 'summary', '').strip()
+        paper['published'] = entry.findtext(ATOM_NS + 'published', '').strip()
+        paper['categories'] = [category.get('term') for category in entry.iter(ATOM_NS + 'category')]
+        paper['primary_category'] = primary.get('term') if primary is not None else None
+        paper['authors'] = [name.text.strip() for name in entry.iterfind(f'{ATOM_NS}author/{ATOM_NS}name')]
+        yield paper
+
+        # Drop the parsed entry and any siblings already handled
+        entry.clear()
+        while entry.getprevious() is not None:
+            del entry.getparent()[0]
+
+def parse_total_results(xml_content):
+    """Read opensearch:totalResults, the number of matches for the page's query."""
+    for _, element in etree.iterparse(BytesIO(xml_content), events=('end',),
+                                      tag=OPENSEARCH_NS + 'totalResults'):
+        return int(element.text)
+    return 0
+
 def parse_arxiv_response(xml_content):
+    return list(iter_arxiv_entries(xml_content))
+
+def parse_arxiv_response_soup(xml_content):
+    """Original BeautifulSoup parser, kept as the baseline for parser benchmarks."""
     soup = BeautifulSoup(xml_content, 'lxml')       ### ----> Changed xml parser to lxml
     papers = []
     
     for entry in soup.find_all('entry'):
+        primary = entry.find('arxiv:primary_category')
         paper = {}
+        paper['arxiv_id'] = _arxiv_id(entry.id.text)
+        paper['updated'] = entry.updated.text.strip()
         paper['title'] = entry.title.text.strip()
         paper['abstract'] = entry.summary.text.strip()
         paper['published'] = entry.published.text.strip()
              ### ----> Changed to same as above lines to fix error ---> same error ---> removing to see what happens ---> worked collecting papers
         paper['categories'] = [category['term'] for category in entry.find_all('category')]
+        paper['primary_category'] = primary['term'] if primary is not None else None
+        paper['authors'] = [author.find('name').text.strip() for author in entry.find_all('author')]
         papers.append(paper)
     
     return papers
 
-def collect_arxiv_data(query, total_results=1000, batch_size=100):
+def iter_arxiv_pages(query, total_results=1000, batch_size=100, max_workers=4,
+                     requests_per_second=ARXIV_REQUESTS_PER_SECOND, base_url=ARXIV_API_URL,
+                     cache_path=None, incremental=True):
+    """Yield the harvested papers of each page, in page order, as soon as the page is parsed.
+
+    With a stored watermark, only entries updated since the last complete harvest are yielded.
+    """
+    harvest_options = dict(max_workers=max_workers, requests_per_second=requests_per_second,
+                           base_url=base_url)
+    cache = HarvestCache(cache_path) if cache_path else None
+    watermark = cache.get_watermark(query) if cache is not None and incremental else None
+    starts = count(0, batch_size) if watermark is not None else range(0, total_results, batch_size)
+
+    if cache is None or watermark is not None:
+        pages = harvest_pages(query, starts, batch_size, **harvest_options)
+    else:
+        pages = harvest_with_cache(query, starts, batch_size, cache, **harvest_options)
+
+    newest = None
+    complete = watermark is None
+    try:
+        for start, xml_content in pages:
+            papers = parse_arxiv_response(xml_content)
+            reached_watermark = end_of_feed = False
+            if watermark is not None:
+                new_papers = [paper for paper in papers if paper['updated'] > watermark]
+                reached_watermark = len(new_papers) < len(papers)
+                end_of_feed = start + batch_size >= parse_total_results(xml_content)
+                papers = new_papers
+            if papers:
+                newest = max([newest or papers[0]['updated']] + [paper['updated'] for paper in papers])
+            yield papers
+            if reached_watermark:
+                logging.info(f"Reached papers harvested before {watermark}; stopping at start={start}")
+            elif end_of_feed:
+                logging.info(f"Reached the end of the feed at start={start}")
+            if reached_watermark or end_of_feed:
+                complete = True
+                break
+        if not complete:
+            logging.warning(f"Harvest ended before reaching papers harvested before {watermark}; "
+                            f"keeping the old watermark so the next run fetches the gap")
+        elif cache is not None and newest is not None:
+            cache.set_watermark(query, max(newest, watermark or newest))
+    finally:
+        pages.close()
+        if cache is not None:
+            cache.close()
+
+def collect_arxiv_data(query, total_results=1000, batch_size=100, cache_path=None, incremental=True,
+                       **harvest_options):
+    """Harvest papers for a query into a DataFrame; see iter_arxiv_pages for the options."""
     all_papers = []
-    for start in range(0, total_results, batch_size):
-        xml_content = fetch_arxiv_papers(query, start, batch_size)
-        papers = parse_arxiv_response(xml_content)
+    for papers in iter_arxiv_pages(query, total_results, batch_size, cache_path=cache_path,
+                                   incremental=incremental, **harvest_options):
         all_papers.extend(papers)
         print(f"Collected {len(all_papers)} papers so far...")
-        sleep(3)  # Be respectful to the API
-    
     return pd.DataFrame(all_papers)
 
+def date_window_query(query, window_start, window_end):
+    """Restrict a query to papers submitted in [window_start, window_end)."""
+    last_minute = window_end - timedelta(minutes=1)
+    return (f"{query} AND submittedDate:[{window_start.strftime(SUBMITTED_DATE_FORMAT)}"
+            f" TO {last_minute.strftime(SUBMITTED_DATE_FORMAT)}]")
+
+def plan_date_shards(query, start_date, end_date, fetch_first_page, max_per_shard=5000,
+                     min_window=timedelta(hours=1)):
+    """Split [start_date, end_date) into submittedDate windows small enough to page through.
+
+    Yields (window_query, total_results, first_page) in chronological order.
+    A window holding more than max_per_shard results is halved until it
+    fits or shrinks to min_window; the probe page of every kept window is
+    returned so it doubles as that shard's first page.
+    """
+    windows = [(start_date, end_date)]
+    while windows:
+        window_start, window_end = windows.pop()
+        window_query = date_window_query(query, window_start, window_end)
+        first_page = fetch_first_page(window_query)
+        total_results = parse_total_results(first_page)
+        if total_results > max_per_shard and window_end - window_start > min_window:
+            middle = (window_start + (window_end - window_start) / 2).replace(second=0, microsecond=0)
+            windows.extend([(middle, window_end), (window_start, middle)])
+            continue
+        yield window_query, total_results, first_page
+
+def collect_arxiv_data_sharded(query, start_date, end_date, batch_size=100, max_per_shard=5000,
+                               max_workers=4, requests_per_second=ARXIV_REQUESTS_PER_SECOND,
+                               base_url=ARXIV_API_URL, cache_path=None):
+    """Harvest a date range as submittedDate shards that share one rate budget.
+
+    Sharding keeps every shard's offsets shallow, so a multi-year backfill
+    is not limited by the API's paging ceiling. Papers returned by more
+    than one shard are deduplicated by arXiv id.
+    """
+    rate_limiter = TokenBucket(requests_per_second)
+    session = make_session(pool_size=max_workers)
+    cache = HarvestCache(cache_path) if cache_path else None
+    harvest_options = dict(max_workers=max_workers, base_url=base_url,
+                           rate_limiter=rate_limiter, session=session)
+
+    def fetch_first_page(window_query):
+        if cache is not None and 0 in cache.cached_starts(window_query, batch_size):
+            return cache.get_page(window_query, 0, batch_size)
+        xml_content = fetch_with_retry(window_query, 0, batch_size, session, rate_limiter, base_url)
+        if cache is not None:
+            cache.put_page(window_query, 0, batch_size, xml_content)
+        return xml_content
+
+    all_papers = []
+    finished_shards = {}
+    try:
+        for window_query, total_results, first_page in plan_date_shards(
+                query, start_date, end_date, fetch_first_page, max_per_shard):
+            shard_papers = parse_arxiv_response(first_page)
+            starts = range(batch_size, total_results, batch_size)
+            if cache is not None:
+                pages = harvest_with_cache(window_query, starts, batch_size, cache, **harvest_options)
+            else:
+                pages = harvest_pages(window_query, starts, batch_size, **harvest_options)
+            for _, xml_content in pages:
+                shard_papers.extend(parse_arxiv_response(xml_content))
+            all_papers.extend(shard_papers)
+            if shard_papers:
+                finished_shards[window_query] = max(paper['updated'] for paper in shard_papers)
+            print(f"Collected {len(all_papers)} papers so far ({window_query})...")
+
+        # Cached shard pages stay reusable until the whole backfill completes
+        if cache is not None:
+            for window_query, newest in finished_shards.items():
+                cache.set_watermark(window_query, newest)
+    finally:
+        session.close()
+        if cache is not None:
+            cache.close()
+
+    return deduplicate_papers(pd.DataFrame(all_papers))
+
+def deduplicate_papers(df):
+    """Keep only the most recently updated copy of each arXiv id, preserving row order."""
+    if df.empty or 'arxiv_id' not in df.columns:
+        return df
+    newest_first = df.sort_values('updated', ascending=False, kind='stable')
+    return newest_first.drop_duplicates(subset='arxiv_id').sort_index().reset_index(drop=True)
+
+def merge_new_papers(df_new, df_existing):
+    """Put freshly harvested papers in front of the existing dataset, replacing older copies."""
+    merged = pd.concat([df_new, df_existing], ignore_index=True)
+    if 'arxiv_id' in df_existing.columns:
+        return deduplicate_papers(merged)
+    return merged.drop_duplicates(subset='title', keep='first').reset_index(drop=True)
+
+def run_collection(query=ARXIV_QUERY, cache_path=HARVEST_CACHE_PATH, full=False):
+    """Harvest new papers and merge them into the saved dataset (unless full); returns the dataset."""
+    merge = not full and stage_table_exists(RAW_PAPERS)
+    df = deduplicate_papers(collect_arxiv_data(query, cache_path=cache_path, incremental=merge))
+    if merge:
+        print(f"Harvested {len(df)} new or updated papers")
+        df = merge_new_papers(df, read_stage_table(RAW_PAPERS))
+    return df
+
 # Main execution
 if __name__ == "__main__":
-    query = 'all:semiconductor'
-    df = collect_arxiv_data(query)
+    parser = argparse.ArgumentParser(description='Harvest semiconductor papers from arXiv.')
+    parser.add_argument('--full', action='store_true',
+                        help='ignore the stored watermark and re-harvest every page')
+    parser.add_argument('--cache', default=HARVEST_CACHE_PATH,
+                        help='SQLite file holding cached pages and the update watermark')
+    parser.add_argument('--since', type=lambda day: datetime.strptime(day, '%Y-%m-%d'),
+                        help='backfill papers submitted from this date (YYYY-MM-DD) in date-window shards')
+    parser.add_argument('--until', type=lambda day: datetime.strptime(day, '%Y-%m-%d'),
+                        help='end date (exclusive) of a --since backfill, default tomorrow')
+    args = parser.parse_args()
+
+    if args.since:
+        until = args.until or datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+        df = collect_arxiv_data_sharded(ARXIV_QUERY, args.since, until, cache_path=args.cache)
+        if not args.full and stage_table_exists(RAW_PAPERS):
+            print(f"Harvested {len(df)} new or updated papers")
+            df = merge_new_papers(df, read_stage_table(RAW_PAPERS))
+    else:
+        df = run_collection(ARXIV_QUERY, args.cache, args.full)
     
-    # Save to CSV
-    df.to_csv('arxiv_semiconductors.csv', index=False)
-    print(f"Saved {len(df)} papers to arxiv_semiconductors_chemistry.csv")
+    output_file = write_stage_table(df, RAW_PAPERS)
+    print(f"Saved {len(df)} papers to {output_file}")
 
     # Display first few rows and basic info
     print(df.head())
-    print(df.info()) 
\ No newline at end of file
+    print(df.info())
\ No newline at end of file
@@ -3,19 +3,21 @@ import nltk
 from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
-from nltk.collocations import BigramAssocMeasures, BigramCollocationFinder
-from nltk.collocations import TrigramAssocMeasures, TrigramCollocationFinder
-nltk.download('averaged_perceptron_tagger_eng')
+from nltk.tag import PerceptronTagger
 import re
 from collections import Counter
+from functools import lru_cache
+from math import log2
+import os
 import logging
+from compoundsV3 import CompoundMatcher
+from parallelV3 import process_pool, chunk_slices
+from nltkResourcesV3 import require_nltk_data, PREPROCESSING_RESOURCES
+from paperCacheV3 import PaperCache, PAPER_CACHE_PATH, fingerprint
+from storageV3 import RAW_PAPERS, PREPROCESSED, read_stage_table, write_stage_table
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
-# Download necessary NLTK data
-for package in ['punkt', 'stopwords', 'wordnet', 'averaged_perceptron_tagger']:
-    nltk.download(package)
-
 TECHNICAL_STOPWORDS = {
     # General science terms
     'study', 'result', 'show', 'using', 'method', 'analysis', 'experimental',
@@ -36,6 +38,9 @@ TECHNICAL_STOPWORDS = {
     'quantum', 'spin', 'laser', 'topological'  # Only filtered when standalone
 }
 
+# Bump when preprocessing logic changes so cached per-paper results are recomputed
+PREPROCESS_VERSION = 1
+
 PRESERVE_COMPOUNDS = {
     # Quantum-related compounds
     'quantum dot', 'quantum well', 'quantum computing', 'quantum state',
@@ -59,110 +64,238 @@ PRESERVE_COMPOUNDS = {
     'josephson junction', 'molecular beam'
 }
 
+COMPOUND_MATCHER = CompoundMatcher(PRESERVE_COMPOUNDS)
+
+def preprocessing_fingerprint():
+    """Version of everything that shapes preprocessing output, for cache keys."""
+    return fingerprint(PREPROCESS_VERSION, TECHNICAL_STOPWORDS, PRESERVE_COMPOUNDS, nltk.__version__)
+
 def protect_compounds(text: str) -> str:
     """Replace preserved compounds with single tokens."""
-    protected_text = text.lower()
-    for compound in sorted(PRESERVE_COMPOUNDS, key=len, reverse=True):
-        if compound in protected_text:
-            protected_token = compound.replace(' ', '_')
-            protected_text = protected_text.replace(compound, protected_token)
-    return protected_text
+    return COMPOUND_MATCHER.protect(text)
 
 def restore_compounds(text: str) -> str:
     """Restore protected compounds back to original form."""
-    restored_text = text
-    for compound in PRESERVE_COMPOUNDS:
-        protected_token = compound.replace(' ', '_')
-        restored_text = restored_text.replace(protected_token, compound)
-    return restored_text
+    return COMPOUND_MATCHER.restore(text)
+
+class PreprocessingEngine:
+    """Preprocessing with the tagger, lemmatizer and stopword set loaded once.
+
+    Documents are POS-tagged in batches, each document tagged as one
+    sequence exactly as nltk.pos_tag would, and lemmas are memoized in a
+    bounded cache.
+    """
+    def __init__(self, lemma_cache_size=100_000):
+        require_nltk_data(*PREPROCESSING_RESOURCES)
+        self.tagger = PerceptronTagger()
+        self.stop_words = set(stopwords.words('english')).union(TECHNICAL_STOPWORDS)
+        self.lemmatize = lru_cache(maxsize=lemma_cache_size)(WordNetLemmatizer().lemmatize)
+
+    def tokenize(self, text):
+        # Convert to lowercase and protect compounds
+        text = protect_compounds(text.lower())
+        
+        # Remove URLs and references
+        text = re.sub(r'http\S+|www\S+|\[.*?\]|\(.*?\)', '', text)
+        
+        return word_tokenize(text)
+
+    def finish(self, pos_tags):
+        """Filter, lemmatize and restore compounds for one tagged document."""
+        filtered_tokens = []
+        for token, pos in pos_tags:
+            if ('_' in token or  # Preserved compound
+                (token not in self.stop_words and
+                 len(token) > 2 and
+                 (pos.startswith(('NN', 'JJ')) or
+                  '-' in token or
+                  any(char.isdigit() for char in token)))):
+                filtered_tokens.append(token)
+        
+        tokens = [self.lemmatize(token) for token in filtered_tokens]
+        return restore_compounds(' '.join(tokens))
+
+    def preprocess_batch(self, texts):
+        """Preprocess a batch of texts, tagging all of them in one call."""
+        texts = list(texts)
+        valid = [i for i, text in enumerate(texts) if not isinstance(text, float)]
+        tagged = self.tagger.tag_sents([self.tokenize(texts[i]) for i in valid])
+        processed = [""] * len(texts)
+        for i, pos_tags in zip(valid, tagged):
+            processed[i] = self.finish(pos_tags)
+        return processed
+
+    def preprocess(self, text):
+        return self.preprocess_batch([text])[0]
+
+_engine = None
+
+def get_engine():
+    """Shared PreprocessingEngine, created on first use."""
+    global _engine
+    if _engine is None:
+        _engine = PreprocessingEngine()
+    return _engine
 
 def preprocess_text(text):
     """Enhanced preprocessing with compound preservation."""
-    if isinstance(text, float):
-        return ""
-    
-    # Convert to lowercase and protect compounds
-    text = protect_compounds(text.lower())
-    
-    # Remove URLs and references
-    text = re.sub(r'http\S+|www\S+|\[.*?\]|\(.*?\)', '', text)
-    
-    # Tokenize
-    tokens = word_tokenize(text)
-    
-    # POS tagging
-    pos_tags = nltk.pos_tag(tokens)
-    
-    # Custom filtering
-    stop_words = set(stopwords.words('english')).union(TECHNICAL_STOPWORDS)
-    filtered_tokens = []
-    
-    for token, pos in pos_tags:
-        if ('_' in token or  # Preserved compound
-            (token not in stop_words and
-             len(token) > 2 and
-             (pos.startswith(('NN', 'JJ')) or
-              '-' in token or
-              any(char.isdigit() for char in token)))):
-            filtered_tokens.append(token)
-    
-    # Lemmatize
-    lemmatizer = WordNetLemmatizer()
-    tokens = [lemmatizer.lemmatize(token) for token in filtered_tokens]
-    
-    # Restore protected compounds
-    processed_text = restore_compounds(' '.join(tokens))
-    
-    return processed_text
+    return get_engine().preprocess(text)
 
-def extract_technical_phrases(text):
-    """Extract technical phrases considering preserved compounds."""
+def preprocess_series(texts, batch_size=512):
+    """Preprocess a text column batch by batch with the shared engine."""
+    engine = get_engine()
+    processed = []
+    for start in range(0, len(texts), batch_size):
+        processed.extend(engine.preprocess_batch(texts.iloc[start:start + batch_size]))
+    return pd.Series(processed, index=texts.index)
+
+def phrase_tokens(text):
+    """Tokenize text for collocation counting, keeping preserved compounds whole."""
     text = protect_compounds(text)
-    sentences = sent_tokenize(text)
     all_words = []
     
-    for sentence in sentences:
+    for sentence in sent_tokenize(text):
         cleaned = re.sub(r'[^\w\s-]', ' ', sentence)
-        words = word_tokenize(cleaned)
-        all_words.extend(words)
+        all_words.extend(word_tokenize(cleaned))
     
-    # Extract bigrams
-    bigram_measures = BigramAssocMeasures()
-    bigram_finder = BigramCollocationFinder.from_words(all_words)
-    bigram_finder.apply_freq_filter(5)
-    bigrams = bigram_finder.nbest(bigram_measures.pmi, 30)
+    return all_words
+
+class CollocationEngine:
+    """Bigram and trigram counts accumulated across a whole corpus.
+
+    PMI is computed from the global counts (as nltk's collocation finders
+    would over the concatenated corpus), so the frequency filters see
+    every abstract at once, and update() folds in new papers without
+    recounting the old ones. Each document is then assigned the scored
+    n-grams it contains with plain dict lookups.
+    """
+    def __init__(self, min_bigram_freq=5, min_trigram_freq=3, max_phrases=30, stop_words=()):
+        self.min_bigram_freq = min_bigram_freq
+        self.min_trigram_freq = min_trigram_freq
+        self.max_phrases = max_phrases
+        self.stop_words = set(stop_words)
+        self.word_counts = Counter()
+        self.bigram_counts = Counter()
+        self.trigram_counts = Counter()
+        self._scores = None
+
+    def update(self, token_lists):
+        """Add the words, bigrams and trigrams of each token list to the counts."""
+        for words in token_lists:
+            self.word_counts.update(words)
+            self.bigram_counts.update(zip(words, words[1:]))
+            self.trigram_counts.update(zip(words, words[1:], words[2:]))
+        self._scores = None
+
+    def _keep(self, ngram, count, min_freq):
+        return (count >= min_freq and
+                ngram[0] not in self.stop_words and ngram[-1] not in self.stop_words)
+
+    def scores(self):
+        """PMI of every n-gram passing the frequency filters, cached until the next update."""
+        if self._scores is None:
+            words = self.word_counts
+            log_total = log2(sum(words.values()) or 1)
+            scores = {}
+            for (w1, w2), count in self.bigram_counts.items():
+                if self._keep((w1, w2), count, self.min_bigram_freq):
+                    scores[w1, w2] = log2(count) + log_total - log2(words[w1] * words[w2])
+            for (w1, w2, w3), count in self.trigram_counts.items():
+                if self._keep((w1, w2, w3), count, self.min_trigram_freq):
+                    scores[w1, w2, w3] = (log2(count) + 2 * log_total -
+                                          log2(words[w1] * words[w2] * words[w3]))
+            self._scores = scores
+        return self._scores
+
+    def _best(self, ngrams):
+        scores = self.scores()
+        found = {ngram for ngram in ngrams if ngram in scores}
+        best = sorted(found, key=lambda ngram: (-scores[ngram], ngram))[:self.max_phrases]
+        return [tuple(restore_compounds(' '.join(ngram)).split()) for ngram in best]
+
+    def document_phrases(self, words):
+        """Highest-PMI bigrams and trigrams occurring in one token list, compounds restored."""
+        return (self._best(zip(words, words[1:])),
+                self._best(zip(words, words[1:], words[2:])))
+
+def extract_technical_phrases(text):
+    """Extract technical phrases considering preserved compounds, from this text alone."""
+    words = phrase_tokens(text)
+    collocations = CollocationEngine()
+    collocations.update([words])
+    return collocations.document_phrases(words)
+
+def _preprocess_chunk(chunk):
+    """Preprocess one chunk of titles and abstracts with this process's engine."""
+    titles, abstracts = chunk
+    engine = get_engine()
+    return (engine.preprocess_batch(titles),
+            engine.preprocess_batch(abstracts),
+            [phrase_tokens(text) for text in abstracts])
+
+def preprocess_dataframe(df, collocations=None, workers=1, chunk_size=512, cache=None):
+    """Preprocess the dataframe with enhanced technical term extraction.
+
+    Rows are processed in chunks of chunk_size; with workers > 1 the chunks
+    are spread over a process pool whose workers each load the NLTK
+    resources once. Results are reassembled in row order, identical to the
+    serial run. With a PaperCache, only papers missing from it are processed.
+    Technical phrases are scored over the whole corpus; pass an existing
+    CollocationEngine to add this dataframe's abstracts to its counts.
+    """
+    logging.info(f"Starting text preprocessing ({workers} worker(s))...")
+    require_nltk_data(*PREPROCESSING_RESOURCES)
     
-    # Extract trigrams
-    trigram_measures = TrigramAssocMeasures()
-    trigram_finder = TrigramCollocationFinder.from_words(all_words)
-    trigram_finder.apply_freq_filter(3)
-    trigrams = trigram_finder.nbest(trigram_measures.pmi, 30)
+    titles, abstracts = df['title'].tolist(), df['abstract'].tolist()
+    rows = [None] * len(df)
+    if cache is not None:
+        keys = [cache.key(title, abstract) for title, abstract in zip(titles, abstracts)]
+        cached = cache.get_many(keys)
+        rows = [cached.get(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
     
-    # Restore compounds in extracted phrases
-    bigrams = [tuple(restore_compounds(' '.join(bg)).split()) for bg in bigrams]
-    trigrams = [tuple(restore_compounds(' '.join(tg)).split()) for tg in trigrams]
+    chunks = [([titles[i] for i in missing[part]], [abstracts[i] for i in missing[part]])
+              for part in chunk_slices(len(missing), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        results = list(map(_preprocess_chunk, chunks))
+    else:
+        with process_pool(workers, initializer=get_engine) as pool:
+            results = list(pool.map(_preprocess_chunk, chunks))
     
-    return bigrams, trigrams
-
-def preprocess_dataframe(df):
-    """Preprocess the dataframe with enhanced technical term extraction."""
-    logging.info("Starting text preprocessing...")
+    computed = (row for chunk_results in results for row in zip(*chunk_results))
+    for i, row in zip(missing, computed):
+        rows[i] = row
+    if cache is not None:
+        cache.put_many({keys[i]: rows[i] for i in missing})
+        cache.report()
     
-    df['processed_title'] = df['title'].apply(preprocess_text)
-    df['processed_abstract'] = df['abstract'].apply(preprocess_text)
-    df['technical_phrases'] = df['abstract'].apply(
-        lambda x: [' '.join(phrase) for phrase in extract_technical_phrases(x)[0] + extract_technical_phrases(x)[1]]
-    )
+    df['processed_title'] = [row[0] for row in rows]
+    df['processed_abstract'] = [row[1] for row in rows]
+    abstract_tokens = [row[2] for row in rows]
+    
+    if collocations is None:
+        collocations = CollocationEngine(stop_words=stopwords.words('english'))
+    collocations.update(abstract_tokens)
+    df['technical_phrases'] = [
+        [' '.join(phrase) for phrases in collocations.document_phrases(words) for phrase in phrases]
+        for words in abstract_tokens
+    ]
     
     logging.info("Preprocessing complete.")
     return df
 
+def run_preprocessing(df, workers=None):
+    """Preprocess the collected papers on all cores, reusing the paper cache."""
+    cache = PaperCache(PAPER_CACHE_PATH, 'preprocess', preprocessing_fingerprint())
+    try:
+        return preprocess_dataframe(df, workers=workers or os.cpu_count(), cache=cache)
+    finally:
+        cache.close()
+
 if __name__ == "__main__":
-    df = pd.read_csv('arxiv_semiconductors.csv')
-    df_processed = preprocess_dataframe(df)
+    df_processed = run_preprocessing(read_stage_table(RAW_PAPERS))
     
-    output_filename = 'arxiv_semiconductors_preprocessed.csv'
-    df_processed.to_csv(output_filename, index=False)
+    write_stage_table(df_processed, PREPROCESSED)
     
     print("\nMost Frequent Technical Terms:")
     all_text = ' '.join(df_processed['processed_abstract'])
@@ -1,14 +1,45 @@
 import pandas as pd
+import numpy as np
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
 from collections import Counter
 import re
 from datetime import datetime
+from sklearn.feature_extraction.text import CountVectorizer
 import logging
+import argparse
+import os
+from parallelV3 import process_pool, chunk_slices
+from nltkResourcesV3 import require_nltk_data, SENTIMENT_RESOURCES
+from paperCacheV3 import PaperCache, PAPER_CACHE_PATH, fingerprint
+from storageV3 import (PREPROCESSED, WITH_SENTIMENT, read_stage_table, write_stage_table,
+                       iter_stage_table, stage_table_schema, StageTableWriter)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
+# Bump when scoring logic changes so cached per-paper results are recomputed
+SENTIMENT_VERSION = 2
+
+CITATION_PATTERN = re.compile(r'\[\d+\]|\(\d{4}\)')
+QUANT_PATTERN = re.compile(r'\d+(\.\d+)?%|p\s*<\s*0\.\d+|>\s*\d+(\.\d+)?', re.IGNORECASE)
+STATISTICAL_PATTERN = re.compile(r'\b(significant|correlation|confidence|precision|accuracy)\b', re.IGNORECASE)
+
+# Sentiment categories in code order; the sentiment_category field holds the index
+SENTIMENT_CATEGORIES = ['Strong Positive', 'Moderate Positive', 'Neutral',
+                        'Moderate Negative', 'Strong Negative']
+
+# One record per paper from ScientificSentimentAnalyzer.analyze_batch
+SENTIMENT_DTYPE = np.dtype([
+    ('compound_score', 'f4'),
+    ('technical_confidence', 'f4'),
+    ('result_strength', 'f4'),
+    ('citation_impact', 'f4'),
+    ('base_sentiment', 'f4'),
+    ('sentiment_category', 'i1'),
+])
+METRIC_COLUMNS = SENTIMENT_DTYPE.names[:-1]
+
 # Scientific sentiment indicators combining VADER, Yu, and Athar approaches
 SCIENTIFIC_INDICATORS = {
     'positive': {
@@ -66,14 +97,45 @@ SCIENTIFIC_INDICATORS = {
     }
 }
 
+def sentiment_fingerprint():
+    """Version of everything that shapes sentiment scores, for cache keys."""
+    return fingerprint(SENTIMENT_VERSION, SCIENTIFIC_INDICATORS, nltk.__version__)
+
+class LexiconScorer:
+    """All indicator lexicons compiled into one vocabulary and weight vector.
+
+    A word listed under several categories carries the sum of its weights,
+    as the per-word category loop adds each of them. Scoring a corpus is one
+    sparse document-term matrix times the weight vector, so its cost does
+    not grow with the size of the lexicon.
+    """
+    def __init__(self, indicators=SCIENTIFIC_INDICATORS):
+        weights = {}
+        for category_indicators in indicators.values():
+            for word, weight in category_indicators.items():
+                weights[word] = weights.get(word, 0) + weight
+        self.weights = np.array(list(weights.values()), dtype=np.float64)
+        # Same tokens as text.lower().split()
+        self.vectorizer = CountVectorizer(vocabulary={word: i for i, word in enumerate(weights)},
+                                          tokenizer=str.split, token_pattern=None, lowercase=True)
+
+    def document_term_matrix(self, texts):
+        return self.vectorizer.transform(texts)
+
+    def technical_confidence(self, texts):
+        """Lexicon score of each text, scaled by 1/5 and clipped to [-1, 1]."""
+        scores = self.document_term_matrix(texts) @ self.weights
+        return np.clip(scores / 5, -1, 1)
+
 class ScientificSentimentAnalyzer:
     def __init__(self):
+        require_nltk_data(*SENTIMENT_RESOURCES)
         self.sia = SentimentIntensityAnalyzer()
+        self.lexicon = LexiconScorer()
 
     def _count_citations(self, text):
         """Count number of citations as a measure of scholarly impact"""
-        citation_pattern = r'\[\d+\]|\(\d{4}\)'
-        return len(re.findall(citation_pattern, text))
+        return len(CITATION_PATTERN.findall(text))
 
     def _analyze_technical_confidence(self, text):
         """Analyze the confidence level in technical claims"""
@@ -89,12 +151,9 @@ class ScientificSentimentAnalyzer:
 
     def _analyze_result_strength(self, text):
         """Analyze the strength of reported results"""
-        quant_pattern = r'\d+(\.\d+)?%|p\s*<\s*0\.\d+|>\s*\d+(\.\d+)?'
-        statistical_terms = r'\b(significant|correlation|confidence|precision|accuracy)\b'
-        
-        quant_count = len(re.findall(quant_pattern, text, re.IGNORECASE))
-        stat_count = len(re.findall(statistical_terms, text, re.IGNORECASE))
-        
+        quant_count = len(QUANT_PATTERN.findall(text))
+        stat_count = len(STATISTICAL_PATTERN.findall(text))
+
         return min((quant_count + stat_count) / 5, 1)
 
     def analyze_sentiment(self, text):
@@ -119,6 +178,42 @@ class ScientificSentimentAnalyzer:
             'base_sentiment': base_scores['compound']
         }
 
+    def analyze_batch(self, texts):
+        """Score many texts at once into a SENTIMENT_DTYPE record array.
+
+        Technical confidence comes from one sparse matrix product and the
+        metrics are combined column-wise, so no per-text dict is built.
+        Scores are combined and categorized in float64, then stored as float32.
+        """
+        texts = list(texts)
+        count = len(texts)
+        base_sentiment = np.fromiter((self.sia.polarity_scores(text)['compound'] for text in texts),
+                                     dtype=np.float64, count=count)
+        technical_confidence = self.lexicon.technical_confidence(texts)
+        result_strength = np.fromiter(
+            (len(QUANT_PATTERN.findall(text)) + len(STATISTICAL_PATTERN.findall(text)) for text in texts),
+            dtype=np.float64, count=count)
+        result_strength = np.minimum(result_strength / 5, 1)
+        citation_impact = np.fromiter((len(CITATION_PATTERN.findall(text)) for text in texts),
+                                      dtype=np.float64, count=count)
+        citation_impact = np.minimum(citation_impact / 10, 1)
+
+        compound_score = (
+            base_sentiment * 0.2 +
+            technical_confidence * 0.5 +
+            result_strength * 0.25 +
+            citation_impact * 0.05
+        )
+
+        records = np.empty(count, dtype=SENTIMENT_DTYPE)
+        records['compound_score'] = compound_score
+        records['technical_confidence'] = technical_confidence
+        records['result_strength'] = result_strength
+        records['citation_impact'] = citation_impact
+        records['base_sentiment'] = base_sentiment
+        records['sentiment_category'] = categorize_sentiment_batch(compound_score, technical_confidence)
+        return records
+
 def categorize_scientific_sentiment(scores):
     """Categorize sentiment with scientific context"""
     compound = scores['compound']
@@ -134,45 +229,161 @@ def categorize_scientific_sentiment(scores):
         return 'Moderate Negative'
     return 'Neutral'
 
-def analyze_sentiment_dataframe(df):
-    """Apply scientific sentiment analysis to the dataframe"""
-    analyzer = ScientificSentimentAnalyzer()
-    logging.info("Performing scientific sentiment analysis...")
-    
-    df['sentiment_scores'] = df['abstract'].apply(analyzer.analyze_sentiment)
-    df['compound_score'] = df['sentiment_scores'].apply(lambda x: x['compound'])
-    df['technical_confidence'] = df['sentiment_scores'].apply(lambda x: x['technical_confidence'])
-    df['result_strength'] = df['sentiment_scores'].apply(lambda x: x['result_strength'])
-    df['citation_impact'] = df['sentiment_scores'].apply(lambda x: x['citation_impact'])
-    df['sentiment_category'] = df['sentiment_scores'].apply(categorize_scientific_sentiment)
-    
+def categorize_sentiment_batch(compound, confidence):
+    """categorize_scientific_sentiment over arrays, as codes into SENTIMENT_CATEGORIES"""
+    conditions = [
+        (compound >= 0.3) & (confidence > 0),
+        (compound >= 0.1) & (confidence > 0),
+        (compound <= -0.3) & (confidence < 0),
+        (compound <= -0.1) & (confidence < 0),
+    ]
+    choices = [SENTIMENT_CATEGORIES.index(category) for category in
+               ('Strong Positive', 'Moderate Positive', 'Strong Negative', 'Moderate Negative')]
+    return np.select(conditions, choices, default=SENTIMENT_CATEGORIES.index('Neutral')).astype('i1')
+
+def records_to_columns(df, records):
+    """Write SENTIMENT_DTYPE records into df as float32 and categorical columns."""
+    for column in SENTIMENT_DTYPE.names:
+        if column == 'sentiment_category':
+            df[column] = pd.Categorical.from_codes(records[column], categories=SENTIMENT_CATEGORIES)\
+                .remove_unused_categories()
+        else:
+            df[column] = records[column]
     return df
 
-if __name__ == "__main__":
-    df = pd.read_csv('arxiv_semiconductors_preprocessed.csv')
-    df_with_sentiment = analyze_sentiment_dataframe(df)
-    
-    output_file = f'arxiv_semiconductors_with_sentiment.csv'
-    df_with_sentiment.to_csv(output_file, index=False)
+_analyzer = None
 
-    print("\nScientific Sentiment Analysis Summary:")
-    print(f"Total papers analyzed: {len(df_with_sentiment)}")
-    print("\nSentiment Distribution:")
-    print(df_with_sentiment['sentiment_category'].value_counts(normalize=True).round(3))
-    
-    print("\nAverage Metrics:")
-    print(f"Technical Confidence: {df_with_sentiment['technical_confidence'].mean():.3f}")
-    print(f"Result Strength: {df_with_sentiment['result_strength'].mean():.3f}")
-    print(f"Citation Impact: {df_with_sentiment['citation_impact'].mean():.3f}")
-    
-    print("\nExample of Strong Positive Paper:")
-    positive_example = df_with_sentiment[df_with_sentiment['sentiment_category'] == 'Strong Positive'].iloc[0]
-    print(f"Title: {positive_example['title']}")
-    print(f"Scores: {positive_example['sentiment_scores']}\n")
+def get_analyzer():
+    """This process's ScientificSentimentAnalyzer, built on first use."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = ScientificSentimentAnalyzer()
+    return _analyzer
+
+def _analyze_chunk(texts):
+    return get_analyzer().analyze_batch(texts)
+
+def analyze_texts(texts, workers=1, chunk_size=256):
+    """Score texts into one SENTIMENT_DTYPE array, in input order.
+
+    With workers > 1 the texts are split into small chunks handed to idle
+    pool workers one at a time, so a run of long abstracts does not hold up
+    the others. Each worker builds its analyzer once. Every text is scored
+    on its own, so the output does not depend on workers or chunk_size.
+    """
+    texts = list(texts)
+    chunks = [texts[part] for part in chunk_slices(len(texts), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        results = list(map(_analyze_chunk, chunks))
+    else:
+        with process_pool(workers, initializer=get_analyzer) as pool:
+            results = list(pool.map(_analyze_chunk, chunks))
+    if not results:
+        return np.empty(0, dtype=SENTIMENT_DTYPE)
+    return np.concatenate(results)
+
+def analyze_sentiment_dataframe(df, cache=None, workers=1, chunk_size=256):
+    """Apply scientific sentiment analysis to the dataframe, scoring only cache misses"""
+    logging.info(f"Performing scientific sentiment analysis ({workers} worker(s))...")
     
-    print("\nExample of Strong Negative Paper:")
-    negative_example = df_with_sentiment[df_with_sentiment['sentiment_category'] == 'Strong Negative'].iloc[0]
-    print(f"Title: {negative_example['title']}")
-    print(f"Scores: {negative_example['sentiment_scores']}")
+    if cache is None:
+        records = analyze_texts(df['abstract'], workers, chunk_size)
+    else:
+        keys = [cache.key(title, abstract) for title, abstract in zip(df['title'], df['abstract'])]
+        scores = cache.get_many(keys)
+        missing = [(key, abstract) for key, abstract in zip(keys, df['abstract']) if key not in scores]
+        computed = analyze_texts([abstract for _, abstract in missing], workers, chunk_size)
+        # Cached as plain tuples, one per paper
+        computed = dict(zip([key for key, _ in missing], computed.tolist()))
+        cache.put_many(computed)
+        cache.report()
+        scores.update(computed)
+        records = np.array([scores[key] for key in keys], dtype=SENTIMENT_DTYPE)
+
+    return records_to_columns(df, records)
+
+class SentimentSummary:
+    """Running totals for the stage report, kept in constant memory."""
+    def __init__(self):
+        self.papers = 0
+        self.category_counts = Counter()
+        self.metric_sums = dict.fromkeys(['technical_confidence', 'result_strength', 'citation_impact'], 0.0)
+        self.examples = {}
+
+    def update(self, df):
+        """Add one scored chunk to the totals."""
+        self.papers += len(df)
+        self.category_counts.update(df['sentiment_category'].value_counts().to_dict())
+        for column in self.metric_sums:
+            self.metric_sums[column] += float(df[column].to_numpy(dtype='float64').sum())
+        for category in ('Strong Positive', 'Strong Negative'):
+            matches = df[df['sentiment_category'] == category]
+            if category not in self.examples and len(matches):
+                example = matches.iloc[0]
+                self.examples[category] = (example['title'],
+                                           {column: round(float(example[column]), 4) for column in METRIC_COLUMNS})
+
+    def report(self):
+        print("\nScientific Sentiment Analysis Summary:")
+        print(f"Total papers analyzed: {self.papers}")
+        print("\nSentiment Distribution:")
+        counts = pd.Series({category: count for category, count in self.category_counts.items() if count},
+                           name='proportion').rename_axis('sentiment_category')
+        print((counts.sort_values(ascending=False) / self.papers).round(3))
+
+        print("\nAverage Metrics:")
+        print(f"Technical Confidence: {self.metric_sums['technical_confidence'] / self.papers:.3f}")
+        print(f"Result Strength: {self.metric_sums['result_strength'] / self.papers:.3f}")
+        print(f"Citation Impact: {self.metric_sums['citation_impact'] / self.papers:.3f}")
+
+        for category in ('Strong Positive', 'Strong Negative'):
+            print(f"\nExample of {category} Paper:")
+            if category not in self.examples:
+                print("None found")
+                continue
+            title, scores = self.examples[category]
+            print(f"Title: {title}")
+            print(f"Scores: {scores}")
+
+def analyze_sentiment_stream(input_name, output_name, chunk_size=50000, cache=None, workers=1):
+    """Score a stage table chunk by chunk, appending each chunk to the output table.
+
+    Only one chunk is held in memory at a time. Returns the SentimentSummary
+    of the whole run.
+    """
+    summary = SentimentSummary()
+    with StageTableWriter(output_name, schema=stage_table_schema(input_name)) as writer:
+        for chunk in iter_stage_table(input_name, chunk_size):
+            chunk = analyze_sentiment_dataframe(chunk, cache=cache, workers=workers)
+            writer.write(chunk)
+            summary.update(chunk)
+    return summary
+
+def run_sentiment(df, workers=None):
+    """Score the preprocessed papers on all cores, reusing the paper cache, and log a summary."""
+    cache = PaperCache(PAPER_CACHE_PATH, 'sentiment', sentiment_fingerprint())
+    try:
+        df_with_sentiment = analyze_sentiment_dataframe(df, cache=cache, workers=workers or os.cpu_count())
+    finally:
+        cache.close()
+    summary = SentimentSummary()
+    summary.update(df_with_sentiment)
+    summary.report()
+    return df_with_sentiment
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Score scientific sentiment of preprocessed papers.')
+    parser.add_argument('--chunk-size', type=int,
+                        help='stream the input in chunks of this many papers to bound memory use')
+    args = parser.parse_args()
+
+    if args.chunk_size:
+        cache = PaperCache(PAPER_CACHE_PATH, 'sentiment', sentiment_fingerprint())
+        summary = analyze_sentiment_stream(PREPROCESSED, WITH_SENTIMENT, args.chunk_size,
+                                           cache=cache, workers=os.cpu_count())
+        cache.close()
+        summary.report()
+    else:
+        write_stage_table(run_sentiment(read_stage_table(PREPROCESSED)), WITH_SENTIMENT)
 
-    logging.info("Analysis complete!")
\ No newline at end of file
+    logging.info("Analysis complete!")
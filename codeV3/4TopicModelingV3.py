@@ -1,14 +1,48 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.utils import murmurhash3_32
 from collections import Counter
+import argparse
+import hashlib
 import logging
+import os
+import pickle
+import struct
+import time
+import zipfile
 from datetime import datetime
-from typing import List, Dict, Set
+from typing import Callable, Iterable, List, Dict, Optional, Set, Tuple
 import re
+from compoundsV3 import CompoundMatcher
+from parallelV3 import process_pool, chunk_slices
+from storageV3 import (WITH_SENTIMENT, WITH_TOPICS, read_stage_table, write_stage_table, iter_stage_table,
+                       stage_table_schema, StageTableWriter)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+# gensim logs every training pass at INFO
+logging.getLogger('gensim').setLevel(logging.WARNING)
+
+TOPIC_MODEL_PATH = 'topic_model.pkl'
+DOC_TERM_PATH = 'doc_term_matrix.npz'
+
+DEFAULT_NUM_TOPICS = 5
+DEFAULT_LDA_BACKEND = 'sklearn'
+
+# Topic count sweep: how to pick the best k from each fit's metrics
+SWEEP_CRITERIA = {
+    'coherence': lambda result: result['coherence'],     # highest UMass coherence
+    'perplexity': lambda result: -result['perplexity'],  # lowest perplexity
+}
+
+# Refit from scratch when new papers fit the saved model this much worse
+# (relative increase in perplexity) or bring this many more unseen terms
+# (increase in the share of terms outside the vocabulary) than the first
+# papers added after the last fit
+PERPLEXITY_DRIFT_THRESHOLD = 0.2
+VOCABULARY_DRIFT_THRESHOLD = 0.05
 
 GENERIC_TERMS = {
     'based', 'using', 'via', 'new', 'novel', 'improved', 'high', 'low',
@@ -19,6 +53,20 @@ GENERIC_TERMS = {
     'work', 'result', 'time', 'first', 'second', 'used', 'based'
 }
 
+# Compounds that make good topic names, listed in naming priority order
+TOPIC_COMPOUNDS = [
+    'quantum dot', 'quantum computing', 'solar cell', 'photonic crystal',
+    'topological quantum', 'semiconductor laser', 'epitaxial growth', 'thin film'
+]
+
+TOPIC_COMPOUND_MATCHER = CompoundMatcher(TOPIC_COMPOUNDS)
+
+HYPHENATED_PATTERN = re.compile(r'\w+(?:-\w+)+')
+
+# Keywords considered for each topic's name (the original argsort()[:-20:-1] slice)
+TOPIC_KEYWORDS = 19
+TOPIC_EXAMPLE_PAPERS = 5
+
 def clean_term(term: str) -> str:
     """Clean a single term while preserving meaningful compounds."""
     term = re.sub(r'[^a-zA-Z\s-]', '', term)
@@ -28,28 +76,38 @@ def clean_term(term: str) -> str:
 def find_compound_terms(text: str) -> List[str]:
     """Find meaningful technical compound terms."""
     compounds = []
-    hyphenated = re.findall(r'\w+(?:-\w+)+', text.lower())
+    hyphenated = HYPHENATED_PATTERN.findall(text.lower())
     if hyphenated:
         compounds.extend(hyphenated)
     
-    text = text.lower()
-    if 'quantum dot' in text: compounds.append('quantum dot')
-    if 'quantum computing' in text: compounds.append('quantum computing')
-    if 'solar cell' in text: compounds.append('solar cell')
-    if 'photonic crystal' in text: compounds.append('photonic crystal')
-    if 'topological quantum' in text: compounds.append('topological quantum')
-    if 'semiconductor laser' in text: compounds.append('semiconductor laser')
-    if 'epitaxial growth' in text: compounds.append('epitaxial growth')
-    if 'thin film' in text: compounds.append('thin film')
+    found = TOPIC_COMPOUND_MATCHER.find_all(text.lower())
+    compounds.extend(compound for compound in TOPIC_COMPOUNDS if compound in found)
     
     return compounds
 
-def get_significant_terms(keywords: List[str], papers: List[str]) -> List[str]:
+def find_title_compounds(titles) -> Dict[str, tuple]:
+    """Hyphenated terms and topic compounds of each distinct title, scanning each title once."""
+    compounds = {}
+    for title in set(titles):
+        text = title.lower()
+        compounds[title] = (HYPHENATED_PATTERN.findall(text), TOPIC_COMPOUND_MATCHER.find_all(text))
+    return compounds
+
+def combine_title_compounds(titles: List[str], title_compounds: Dict[str, tuple]) -> List[str]:
+    """find_compound_terms of several titles, from their precomputed compounds."""
+    compounds = [term for title in titles for term in title_compounds[title][0]]
+    found = set().union(*(title_compounds[title][1] for title in titles))
+    compounds.extend(compound for compound in TOPIC_COMPOUNDS if compound in found)
+    return compounds
+
+def get_significant_terms(keywords: List[str], papers: List[str],
+                          compounds: Optional[List[str]] = None) -> List[str]:
     """Get significant terms prioritizing compounds."""
     clean_keywords = [clean_term(k) for k in keywords if k not in GENERIC_TERMS]
     
-    paper_text = ' '.join(papers).lower()
-    compounds = find_compound_terms(paper_text)
+    if compounds is None:
+        paper_text = ' '.join(papers).lower()
+        compounds = find_compound_terms(paper_text)
     
     significant_terms = []
     for compound in compounds:
@@ -91,59 +149,572 @@ def format_topic_name(terms: List[str], used_names: Set[str]) -> str:
         suffix += 1
     return f"{base} {suffix}"
 
-def get_topic_name(keywords: List[str], papers: List[str], used_names: Set[str]) -> str:
+def get_topic_name(keywords: List[str], papers: List[str], used_names: Set[str],
+                   compounds: Optional[List[str]] = None) -> str:
     """Generate a clean, unique topic name from LDA results."""
-    significant_terms = get_significant_terms(keywords, papers)
+    significant_terms = get_significant_terms(keywords, papers, compounds)
     return format_topic_name(significant_terms, used_names)
 
-def prepare_data_for_lda(df: pd.DataFrame, text_column: str):
+def lda_vectorizer(vocabulary=None) -> CountVectorizer:
+    """The topic model's vectorizer; with a vocabulary it is ready to transform without fitting."""
     vectorizer = CountVectorizer(
         max_df=0.95,
         min_df=2,
         stop_words='english',
-        ngram_range=(1, 2)
+        ngram_range=(1, 2),
+        vocabulary=vocabulary
     )
+    if vocabulary is not None:
+        vectorizer.fit([])
+    return vectorizer
+
+def prepare_data_for_lda(df: pd.DataFrame, text_column: str):
+    vectorizer = lda_vectorizer()
     doc_term_matrix = vectorizer.fit_transform(df[text_column])
     return vectorizer, doc_term_matrix
 
-def perform_lda(doc_term_matrix, num_topics=5):
+def _chunk_counts(analyzer, texts):
+    """Terms of one chunk of texts and the chunk's document-term count matrix."""
+    vectorizer = CountVectorizer(analyzer=analyzer)
+    try:
+        counts = vectorizer.fit_transform(texts)
+    except ValueError:  # no terms left in the chunk, e.g. only stop words
+        return np.array([], dtype=str), sp.csr_matrix((len(texts), 0), dtype=np.int64)
+    return vectorizer.get_feature_names_out(), counts
+
+def _term_buckets(terms, seed: int, n_features: int) -> np.ndarray:
+    hashes = np.fromiter((murmurhash3_32(term, seed=seed, positive=True) for term in terms),
+                         dtype=np.int64, count=len(terms))
+    return hashes % n_features
+
+def build_doc_term_matrix(text_chunks: Callable[[], Iterable], min_df: int = 2, max_df: float = 0.95,
+                          n_features: int = 2 ** 22) -> Tuple[sp.csr_matrix, np.ndarray]:
+    """Build the same matrix and vocabulary as prepare_data_for_lda from streamed chunks of texts.
+
+    text_chunks is called twice and must yield the same chunks each time.
+    """
+    analyzer = lda_vectorizer().build_analyzer()
+    sketch = np.zeros((2, n_features), dtype=np.int32)
+    n_docs = 0
+    for texts in text_chunks():
+        terms, counts = _chunk_counts(analyzer, texts)
+        n_docs += counts.shape[0]
+        doc_frequency = np.bincount(counts.indices, minlength=len(terms))
+        for seed in range(2):
+            np.add.at(sketch[seed], _term_buckets(terms, seed, n_features), doc_frequency)
+
+    vocabulary = {}
+    data, indices, indptr = [], [], [np.zeros(1, dtype=np.int64)]
+    for texts in text_chunks():
+        terms, counts = _chunk_counts(analyzer, texts)
+        estimate = np.minimum(sketch[0][_term_buckets(terms, 0, n_features)],
+                              sketch[1][_term_buckets(terms, 1, n_features)])
+        keep = np.flatnonzero(estimate >= min_df)
+        columns = np.array([vocabulary.setdefault(terms[i], len(vocabulary)) for i in keep], dtype=np.int64)
+        counts = counts[:, keep]
+        data.append(counts.data.astype(np.float64))
+        indices.append(columns[counts.indices])
+        indptr.append(counts.indptr[1:] + indptr[-1][-1])
+    matrix = sp.csr_matrix((np.concatenate(data), np.concatenate(indices), np.concatenate(indptr)),
+                           shape=(n_docs, len(vocabulary)))
+
+    doc_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    max_doc_count = max_df if isinstance(max_df, int) else max_df * n_docs
+    min_doc_count = min_df if isinstance(min_df, int) else min_df * n_docs
+    kept = np.flatnonzero((doc_frequency >= min_doc_count) & (doc_frequency <= max_doc_count))
+    feature_names = np.array(list(vocabulary), dtype=str)
+    order = kept[np.argsort(feature_names[kept], kind='stable')]
+    matrix = matrix[:, order]
+    matrix.sort_indices()
+    return matrix, feature_names[order]
+
+def stage_table_rows(name: str, column: str, rows, chunk_size: int = 20000) -> pd.Series:
+    """Values of one stage table column at increasing row positions, read chunk by chunk."""
+    rows = np.asarray(rows)
+    values = []
+    start = 0
+    for chunk in iter_stage_table(name, chunk_size, [column]):
+        stop = start + len(chunk)
+        selected = rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)]
+        values.append(chunk[column].iloc[selected - start])
+        start = stop
+    return pd.concat(values, ignore_index=True).set_axis(rows)
+
+def save_doc_term_matrix(path: str, matrix, feature_names, paper_keys, text_digest: str) -> None:
+    """Save a CSR matrix in scipy's .npz layout, uncompressed so it can be memory-mapped."""
+    with open(path + '.tmp', 'wb') as f:
+        np.savez(f, format=b'csr', shape=np.array(matrix.shape), data=matrix.data,
+                 indices=matrix.indices, indptr=matrix.indptr,
+                 feature_names=np.asarray(feature_names, dtype=str),
+                 paper_keys=np.asarray(paper_keys, dtype=str),
+                 text_digest=np.array([text_digest]))
+    os.replace(path + '.tmp', path)
+
+def load_doc_term_matrix(path: str):
+    """Memory-map a matrix saved by save_doc_term_matrix.
+
+    Returns (matrix, feature names, paper keys, text digest); the digest is
+    None for files saved before it was kept.
+    """
+    arrays = {}
+    with open(path, 'rb') as f, zipfile.ZipFile(f) as archive:
+        for info in archive.infolist():
+            # Arrays are stored uncompressed after each member's local header
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran_order, dtype = read_header(f)
+            arrays[info.filename[:-len('.npy')]] = np.memmap(
+                path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                order='F' if fortran_order else 'C')
+    matrix = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                           shape=tuple(arrays['shape']), copy=False)
+    text_digest = str(arrays['text_digest'][0]) if 'text_digest' in arrays else None
+    return matrix, arrays['feature_names'], arrays['paper_keys'], text_digest
+
+def stage_text_digest(name: str, text_column: str, chunk_size: int = 20000) -> str:
+    """SHA-256 of a stage table's text column, read chunk by chunk."""
+    digest = hashlib.sha256()
+    for chunk in iter_stage_table(name, chunk_size, [text_column]):
+        digest.update(('\0'.join(chunk[text_column].fillna('')) + '\0').encode('utf-8'))
+    return digest.hexdigest()
+
+def stream_doc_term_matrix(name: str, text_column: str, keys, chunk_size: int = 20000,
+                           path: str = DOC_TERM_PATH):
+    """Doc-term matrix of a stage table's text column, built chunk by chunk and saved to path.
+
+    A saved matrix is reused without re-tokenizing when it covers the same
+    papers in the same order and their texts hash to the saved digest, so
+    reprocessed abstracts are picked up even when no paper was added.
+    """
+    keys = np.asarray(keys, dtype=str)
+    text_digest = stage_text_digest(name, text_column, chunk_size)
+    if os.path.exists(path):
+        matrix, feature_names, saved_keys, saved_digest = load_doc_term_matrix(path)
+        if saved_digest == text_digest and np.array_equal(saved_keys, keys):
+            logging.info(f"Reusing doc-term matrix {path}")
+            return matrix, feature_names
+
+    logging.info(f"Building doc-term matrix in chunks of {chunk_size} papers...")
+    matrix, feature_names = build_doc_term_matrix(
+        lambda: (chunk[text_column].fillna('') for chunk in iter_stage_table(name, chunk_size, [text_column])))
+    save_doc_term_matrix(path, matrix, feature_names, keys, text_digest)
+    logging.info(f"Saved {matrix.shape[0]} x {matrix.shape[1]} doc-term matrix to {path}")
+    return load_doc_term_matrix(path)[:2]
+
+def dataframe_doc_terms(df: pd.DataFrame, text_column: str):
+    """Doc-term matrix and feature names of a dataframe column, built in memory."""
+    vectorizer, doc_term_matrix = prepare_data_for_lda(df, text_column)
+    return doc_term_matrix, vectorizer.get_feature_names_out()
+
+def _sklearn_lda(doc_term_matrix, num_topics, n_jobs):
     lda_model = LatentDirichletAllocation(
         n_components=num_topics,
         max_iter=25,
         learning_method='online',
         random_state=42,
         batch_size=128,
-        n_jobs=-1
+        n_jobs=n_jobs
     )
     lda_output = lda_model.fit_transform(doc_term_matrix)
     return lda_model, lda_output
 
-def analyze_topic_patterns(model, feature_names, lda_output, df):
+class GensimLDA:
+    """gensim LDA model with the parts of the LatentDirichletAllocation API the pipeline uses.
+
+    components_ holds the unnormalized topic-word weights (n_topics x
+    n_terms) and transform returns normalized document-topic rows, so topic
+    naming, assigned_topic and incremental updates work unchanged.
+    Documents are streamed from the CSR matrix's rows without copying it.
+    """
+    def __init__(self, num_topics: int, n_jobs: int = -1, passes: int = 10):
+        self.n_components = num_topics
+        self.n_jobs = n_jobs
+        self.passes = passes
+        self.model = None
+
+    @staticmethod
+    def _corpus(doc_term_matrix):
+        from gensim.matutils import Sparse2Corpus
+        # A CSR matrix's transpose is a CSC view, iterated one document per column
+        return Sparse2Corpus(sp.csr_matrix(doc_term_matrix, copy=False), documents_columns=False)
+
+    def fit(self, doc_term_matrix):
+        from gensim.models import LdaModel, LdaMulticore
+        settings = dict(
+            corpus=self._corpus(doc_term_matrix),
+            num_topics=self.n_components,
+            id2word={term: str(term) for term in range(doc_term_matrix.shape[1])},
+            passes=self.passes,
+            decay=0.7,       # scikit-learn's learning_decay
+            offset=10.0,     # scikit-learn's learning_offset
+            eval_every=None,
+            random_state=42,
+        )
+        if self.n_jobs == 1:
+            self.model = LdaModel(**settings)
+        else:
+            workers = self.n_jobs if self.n_jobs > 0 else max(1, (os.cpu_count() or 2) - 1)
+            self.model = LdaMulticore(workers=workers, **settings)
+        return self
+
+    @property
+    def components_(self) -> np.ndarray:
+        return self.model.state.get_lambda()
+
+    def transform(self, doc_term_matrix, chunk_size: int = 10000) -> np.ndarray:
+        doc_topics = []
+        for start in range(0, doc_term_matrix.shape[0], chunk_size):
+            gamma, _ = self.model.inference(list(self._corpus(doc_term_matrix[start:start + chunk_size])))
+            doc_topics.append(gamma / gamma.sum(axis=1, keepdims=True))
+        if not doc_topics:
+            return np.empty((0, self.n_components))
+        return np.vstack(doc_topics)
+
+    def fit_transform(self, doc_term_matrix) -> np.ndarray:
+        return self.fit(doc_term_matrix).transform(doc_term_matrix)
+
+    def partial_fit(self, doc_term_matrix):
+        self.model.update(self._corpus(doc_term_matrix))
+        return self
+
+    def set_params(self, **params):
+        # gensim tracks the corpus size itself; total_samples has no counterpart
+        return self
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'GensimLDA':
+        """Rebuild a model from the attribute dict TopicModel.save stores for it."""
+        lda = cls.__new__(cls)
+        lda.__dict__.update(state)
+        return lda
+
+def _gensim_lda(doc_term_matrix, num_topics, n_jobs):
+    lda_model = GensimLDA(num_topics, n_jobs)
+    lda_output = lda_model.fit_transform(doc_term_matrix)
+    return lda_model, lda_output
+
+# LDA implementations behind perform_lda, each returning (model, doc-topic matrix)
+LDA_BACKENDS = {
+    'sklearn': _sklearn_lda,
+    'gensim': _gensim_lda,
+}
+
+def perform_lda(doc_term_matrix, num_topics=5, n_jobs=-1, backend=DEFAULT_LDA_BACKEND):
+    return LDA_BACKENDS[backend](doc_term_matrix, num_topics, n_jobs)
+
+def word_perplexity(lda_model, doc_term_matrix, block_nonzeros: int = 2 ** 20) -> float:
+    """Per-word perplexity of documents under their inferred topic mixtures.
+
+    Computed in blocks of about block_nonzeros counts; infinite when no term is in the vocabulary.
+    """
+    counts = sp.csr_matrix(doc_term_matrix, copy=False)
+    total_words = counts.sum()
+    if total_words == 0:
+        return float('inf')
+    doc_topics = lda_model.transform(counts)
+    # Terms x topics, so each nonzero's row is a contiguous gather
+    word_topics = np.ascontiguousarray((lda_model.components_ / lda_model.components_.sum(axis=1, keepdims=True)).T)
+    block_rows = max(1, block_nonzeros * counts.shape[0] // max(counts.nnz, 1))
+    log_likelihood = 0.0
+    for block in chunk_slices(counts.shape[0], block_rows):
+        block_counts = counts[block].tocoo()
+        word_probabilities = np.einsum('ij,ij->i', doc_topics[block][block_counts.row],
+                                       word_topics[block_counts.col])
+        log_likelihood += (block_counts.data * np.log(word_probabilities)).sum()
+    return float(np.exp(-log_likelihood / total_words))
+
+def umass_coherence(lda_model, doc_term_matrix, top_n: int = 10) -> float:
+    """Mean UMass coherence of each topic's top_n words over the fitted documents.
+
+    For each pair of top words, log((D(w_i, w_j) + 1) / D(w_j)) with w_j the
+    higher ranked word and D counting documents; closer to zero is better.
+    """
+    presence = (doc_term_matrix > 0).astype(np.float64).tocsc()
+    lower, higher = np.tril_indices(top_n, -1)
+    scores = []
+    for topic in lda_model.components_:
+        top_words = presence[:, topic.argsort()[::-1][:top_n]]
+        co_documents = (top_words.T @ top_words).toarray()
+        documents = co_documents.diagonal()
+        scores.append(np.log((co_documents[lower, higher] + 1) / documents[higher]).sum())
+    return float(np.mean(scores))
+
+_sweep_matrix = None
+
+def _set_sweep_matrix(doc_term_matrix):
+    global _sweep_matrix
+    _sweep_matrix = doc_term_matrix
+
+def _fit_topic_count(task) -> Dict:
+    num_topics, backend = task
+    start = time.perf_counter()
+    lda_model, lda_output = perform_lda(_sweep_matrix, num_topics, n_jobs=1, backend=backend)
+    return {
+        'num_topics': num_topics,
+        'fit_seconds': time.perf_counter() - start,
+        'perplexity': word_perplexity(lda_model, _sweep_matrix),
+        'coherence': umass_coherence(lda_model, _sweep_matrix),
+        'model': lda_model,
+        'doc_topics': lda_output,
+    }
+
+def sweep_topic_counts(doc_term_matrix, topic_counts: List[int], workers: Optional[int] = None,
+                       backend: str = DEFAULT_LDA_BACKEND) -> List[Dict]:
+    """Fit LDA for each topic count on one doc-term matrix, one fit per pool worker.
+
+    Each fit runs single-threaded and the largest counts start first, so with
+    a worker per count the sweep takes about as long as its slowest fit.
+    Returns per-word perplexity, UMass coherence, fit time, the model and its document
+    topics for each count, in increasing order of count.
+    """
+    tasks = [(num_topics, backend) for num_topics in sorted(set(topic_counts), reverse=True)]
+    _set_sweep_matrix(doc_term_matrix)
+    if workers == 1 or len(tasks) == 1:
+        results = list(map(_fit_topic_count, tasks))
+    else:
+        with process_pool(workers or len(tasks), initializer=_set_sweep_matrix,
+                          initargs=(doc_term_matrix,)) as pool:
+            results = list(pool.map(_fit_topic_count, tasks))
+    return sorted(results, key=lambda result: result['num_topics'])
+
+def select_topic_count(results: List[Dict], criterion: str = 'coherence') -> Dict:
+    """The sweep result that is best by SWEEP_CRITERIA[criterion]."""
+    return max(results, key=SWEEP_CRITERIA[criterion])
+
+def print_sweep(results: List[Dict], best: Dict) -> None:
+    print(f"{'topics':>7}{'perplexity':>12}{'coherence':>11}{'fit sec':>9}")
+    for result in results:
+        marker = '  <- selected' if result is best else ''
+        print(f"{result['num_topics']:>7}{result['perplexity']:>12.1f}{result['coherence']:>11.3f}"
+              f"{result['fit_seconds']:>9.1f}{marker}")
+
+def paper_keys(df: pd.DataFrame) -> pd.Series:
+    """Identify papers by arXiv id, or by title in tables harvested before ids were kept."""
+    return df['arxiv_id'] if 'arxiv_id' in df.columns else df['title']
+
+def paper_versions(df: pd.DataFrame) -> Optional[pd.Series]:
+    """When each paper was last updated on arXiv, or None for tables harvested before it was kept."""
+    return df['updated'] if 'updated' in df.columns else None
+
+class TopicModel:
+    """Vectorizer and LDA model persisted between runs.
+
+    Keeps the topic distribution of every paper it has seen, so a later run
+    only transforms and trains on newly harvested or revised papers. Topic
+    ids and names stay fixed until a full refit.
+    """
+    def __init__(self, num_topics: int = DEFAULT_NUM_TOPICS, text_column: str = 'processed_abstract',
+                 backend: str = DEFAULT_LDA_BACKEND):
+        self.num_topics = num_topics
+        self.backend = backend
+        self.text_column = text_column
+        self.vectorizer = None
+        self.lda = None
+        self.paper_rows = {}
+        self.paper_versions = {}
+        self.doc_topics = np.empty((0, num_topics))
+        self.topic_names = {}
+        self.reference_perplexity = None
+        self.reference_oov_rate = None
+
+    def fit(self, df: pd.DataFrame, doc_term_matrix=None, feature_names=None, fitted=None) -> None:
+        """Fit the vocabulary and topics from scratch on every paper in df.
+
+        A prebuilt doc-term matrix of df's rows and its feature names can be
+        passed instead of tokenizing df here, and with them an LDA model
+        already fitted on that matrix as a (model, document topics) pair.
+        """
+        if doc_term_matrix is None:
+            self.vectorizer, doc_term_matrix = prepare_data_for_lda(df, self.text_column)
+        else:
+            self.vectorizer = lda_vectorizer(vocabulary=[str(name) for name in feature_names])
+        if fitted is None:
+            self.lda, self.doc_topics = perform_lda(doc_term_matrix, self.num_topics, backend=self.backend)
+        else:
+            self.lda, self.doc_topics = fitted
+        self.paper_rows = {key: row for row, key in enumerate(paper_keys(df))}
+        self.paper_versions = {}
+        self.record_versions(df)
+        self.topic_names = {}
+        self.reference_perplexity = None
+        self.reference_oov_rate = None
+
+    def record_versions(self, df: pd.DataFrame) -> None:
+        versions = paper_versions(df)
+        if versions is not None:
+            self.paper_versions.update(zip(paper_keys(df), versions))
+
+    def new_papers(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows of df the model has not seen yet, or has seen in an older version."""
+        keys = paper_keys(df)
+        unseen = ~keys.isin(self.paper_rows.keys())
+        versions = paper_versions(df)
+        if versions is None:
+            return df[unseen]
+        saved_versions = keys.map(self.paper_versions)
+        return df[unseen | (saved_versions.notna() & (saved_versions != versions))]
+
+    def oov_rate(self, texts) -> float:
+        """Share of the vectorizer's terms in texts that are outside its vocabulary."""
+        analyze = self.vectorizer.build_analyzer()
+        vocabulary = self.vectorizer.vocabulary_
+        total = known = 0
+        for text in texts:
+            terms = analyze(text)
+            total += len(terms)
+            known += sum(term in vocabulary for term in terms)
+        return 1 - known / total if total else 0.0
+
+    def drift(self, df: pd.DataFrame) -> Dict[str, float]:
+        """How much worse the saved model describes df than the reference batch.
+
+        The papers a model was fitted on shaped its vocabulary and so look
+        better than any unseen papers; the reference is instead the first
+        batch of new papers after a fit, which sets it and reports no drift.
+        """
+        perplexity = word_perplexity(self.lda, self.vectorizer.transform(df[self.text_column]))
+        oov_rate = self.oov_rate(df[self.text_column])
+        if self.reference_perplexity is None:
+            self.reference_perplexity, self.reference_oov_rate = perplexity, oov_rate
+        return {
+            'perplexity': perplexity / self.reference_perplexity - 1,
+            'vocabulary': oov_rate - self.reference_oov_rate,
+        }
+
+    def needs_refit(self, drift: Dict[str, float]) -> bool:
+        return (drift['perplexity'] > PERPLEXITY_DRIFT_THRESHOLD or
+                drift['vocabulary'] > VOCABULARY_DRIFT_THRESHOLD)
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Train the saved topics on new papers with partial_fit and record their distributions.
+
+        Revised papers keep their row, which is overwritten with the new distribution.
+        """
+        doc_term_matrix = self.vectorizer.transform(df[self.text_column])
+        keys = paper_keys(df)
+        revised = keys.isin(self.paper_rows.keys()).to_numpy()
+        # Weight the batch's statistics by its share of the whole corpus
+        self.lda.set_params(total_samples=len(self.paper_rows) + int((~revised).sum()))
+        self.lda.partial_fit(doc_term_matrix)
+        doc_topics = self.lda.transform(doc_term_matrix)
+        self.doc_topics[[self.paper_rows[key] for key in keys[revised]]] = doc_topics[revised]
+        start = len(self.doc_topics)
+        self.doc_topics = np.vstack([self.doc_topics, doc_topics[~revised]])
+        self.paper_rows.update((key, start + row) for row, key in enumerate(keys[~revised]))
+        self.record_versions(df)
+
+    def doc_topic_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        """Topic distribution of each paper in df, all of which the model has seen."""
+        return self.doc_topics[[self.paper_rows[key] for key in paper_keys(df)]]
+
+    def save(self, path: str) -> None:
+        # The state is pickled as a dict, so it loads whether this stage runs
+        # as a script, under mainV3.py or as an imported module. A GensimLDA
+        # is defined here too, so it is stored as its own attribute dict;
+        # the gensim model inside pickles under gensim's importable path.
+        state = dict(self.__dict__)
+        if isinstance(self.lda, GensimLDA):
+            state['lda'] = None
+            state['gensim_lda'] = dict(self.lda.__dict__)
+        with open(path, 'wb') as f:
+            pickle.dump(state, f)
+
+    @staticmethod
+    def load(path: str) -> 'TopicModel':
+        model = TopicModel()  # defaults for state saved by older versions
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        gensim_state = state.pop('gensim_lda', None)
+        model.__dict__.update(state)
+        if gensim_state is not None:
+            model.lda = GensimLDA.from_state(gensim_state)
+        return model
+
+def fit_or_update(df: pd.DataFrame, path: str = TOPIC_MODEL_PATH, num_topics: Optional[int] = None,
+                  refit: bool = False, doc_terms: Optional[Callable[[], Tuple]] = None,
+                  backend: Optional[str] = None,
+                  texts: Optional[Callable[[pd.DataFrame], pd.Series]] = None) -> TopicModel:
+    """Load the saved topic model and train it on df's new or revised papers, refitting if needed.
+
+    A refit uses doc_terms() if given; texts(rows) supplies the text column when df holds only keys.
+    """
+    model = TopicModel.load(path) if os.path.exists(path) and not refit else None
+    if num_topics is None:
+        num_topics = model.num_topics if model is not None else DEFAULT_NUM_TOPICS
+    if backend is None:
+        backend = model.backend if model is not None else DEFAULT_LDA_BACKEND
+    if model is not None and (model.num_topics, model.backend) != (num_topics, backend):
+        logging.info(f"Saved model has {model.num_topics} {model.backend} topics, "
+                     f"not {num_topics} {backend}; refitting")
+        model = None
+
+    if model is not None:
+        new_papers = model.new_papers(df)
+        if len(new_papers) == 0:
+            logging.info("No new or revised papers; reusing the saved topic model")
+            return model
+        if texts is not None:
+            new_papers = new_papers.assign(**{model.text_column: texts(new_papers)})
+        drift = model.drift(new_papers)
+        logging.info(f"{len(new_papers)} new or revised papers; perplexity drift {drift['perplexity']:+.1%}, "
+                     f"vocabulary drift {drift['vocabulary']:+.1%}")
+        if not model.needs_refit(drift):
+            model.update(new_papers)
+            return model
+        logging.info("Drift above threshold; refitting the topic model")
+
+    model = TopicModel(num_topics, backend=backend)
+    model.fit(df, *(doc_terms() if doc_terms else ()))
+    return model
+
+def top_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """Column indices of the n largest scores in each row, largest first.
+
+    argpartition selects them for all rows at once in linear time; only the
+    n selected scores per row are then sorted.
+    """
+    n = min(n, scores.shape[1])
+    selected = np.argpartition(scores, scores.shape[1] - n, axis=1)[:, -n:]
+    order = np.argsort(-np.take_along_axis(scores, selected, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(selected, order, axis=1)
+
+def analyze_topic_patterns(model, feature_names, lda_output, df, topic_names: Optional[Dict[int, str]] = None):
     topic_info = {}
     used_names = set()
     
-    for topic_idx, topic in enumerate(model.components_):
-        top_words_idx = topic.argsort()[:-20:-1]
-        top_words = [feature_names[i] for i in top_words_idx]
-        
-        doc_probabilities = lda_output[:, topic_idx]
-        top_doc_indices = doc_probabilities.argsort()[-5:][::-1]
-        top_docs = [df.iloc[idx]['title'] for idx in top_doc_indices]
+    feature_names = np.asarray(feature_names)
+    top_words_idx = top_indices(model.components_, TOPIC_KEYWORDS)
+    top_doc_indices = top_indices(lda_output.T, TOPIC_EXAMPLE_PAPERS)
+    top_titles = df['title'].to_numpy()[top_doc_indices]
+    title_compounds = find_title_compounds(top_titles.ravel()) if not topic_names else {}
+    
+    for topic_idx in range(len(top_words_idx)):
+        top_words = feature_names[top_words_idx[topic_idx]].tolist()
+        doc_probabilities = lda_output[top_doc_indices[topic_idx], topic_idx]
+        top_docs = top_titles[topic_idx].tolist()
         
-        topic_name = get_topic_name(top_words, top_docs, used_names)
+        if topic_names:
+            topic_name = topic_names[topic_idx]
+        else:
+            topic_name = get_topic_name(top_words, top_docs, used_names,
+                                        combine_title_compounds(top_docs, title_compounds))
         used_names.add(topic_name)
         
         topic_info[topic_idx] = {
             'name': topic_name,
             'keywords': top_words[:10],
             'example_papers': top_docs[:3],
-            'probabilities': doc_probabilities[top_doc_indices]
+            'probabilities': doc_probabilities
         }
         
         print(f"\nTopic {topic_idx + 1}: {topic_name}")
         print("Top Keywords:", ", ".join(top_words[:10]))
         print("\nMost Representative Papers:")
-        for title, prob in zip(top_docs[:3], doc_probabilities[top_doc_indices][:3]):
+        for title, prob in zip(top_docs[:3], doc_probabilities[:3]):
             print(f"- {title} (Probability: {prob:.3f})")
         print("-" * 50)
     
@@ -169,24 +740,27 @@ def save_topic_analysis(topic_info: Dict, df: pd.DataFrame, filename: str):
             f.write(f"Number of papers: {len(topic_docs)}\n")
             f.write("\n" + "="*50 + "\n")
 
-if __name__ == "__main__":
-    logging.info("Loading data...")
-    df = pd.read_csv('arxiv_semiconductors_with_sentiment.csv')
-    
-    logging.info("Preparing data for topic modeling...")
-    vectorizer, doc_term_matrix = prepare_data_for_lda(df, 'processed_abstract')
-    
-    logging.info("Performing topic modeling...")
-    num_topics = 5
-    lda_model, lda_output = perform_lda(doc_term_matrix, num_topics)
+def run_topic_modeling(df: pd.DataFrame, model_path: str = TOPIC_MODEL_PATH,
+                       topic_model: Optional[TopicModel] = None, **fit_options) -> pd.DataFrame:
+    """Assign each paper its topic, fitting or updating the saved model unless topic_model is given.
+
+    fit_options are passed to fit_or_update. The named topics are saved
+    with the model and written to topic_analysis_report.txt.
+    """
+    if topic_model is None:
+        topic_model = fit_or_update(df, model_path, **fit_options)
+    lda_output = topic_model.doc_topic_matrix(df)
     
     logging.info("Analyzing topic patterns...")
     topic_info = analyze_topic_patterns(
-        lda_model,
-        vectorizer.get_feature_names_out(),
+        topic_model.lda,
+        topic_model.vectorizer.get_feature_names_out(),
         lda_output,
-        df
+        df,
+        topic_model.topic_names
     )
+    topic_model.topic_names = {idx: info['name'] for idx, info in topic_info.items()}
+    topic_model.save(model_path)
     
     df['assigned_topic'] = lda_output.argmax(axis=1)
     df['topic_name'] = df['assigned_topic'].map({idx: info['name'] 
@@ -194,6 +768,64 @@ if __name__ == "__main__":
     
     logging.info("Saving analysis report...")
     save_topic_analysis(topic_info, df, 'topic_analysis_report.txt')
-    df.to_csv('arxiv_semiconductors_with_topics.csv', index=False)
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Model topics of papers with sentiment scores.')
+    parser.add_argument('--refit', action='store_true',
+                        help='fit the topic model from scratch instead of updating the saved one')
+    parser.add_argument('--model', default=TOPIC_MODEL_PATH, help='file holding the persisted topic model')
+    parser.add_argument('--chunk-size', type=int,
+                        help=f'build the doc-term matrix out of core in chunks of this many papers, '
+                             f'saved to {DOC_TERM_PATH} for reuse')
+    parser.add_argument('--num-topics', type=int,
+                        help=f'number of topics (default: the saved model\'s, or {DEFAULT_NUM_TOPICS})')
+    parser.add_argument('--backend', choices=sorted(LDA_BACKENDS),
+                        help=f'LDA implementation (default: the saved model\'s, or {DEFAULT_LDA_BACKEND})')
+    parser.add_argument('--sweep', type=int, nargs='+', metavar='K',
+                        help='fit a model for each topic count in parallel and keep the best one')
+    parser.add_argument('--criterion', choices=sorted(SWEEP_CRITERIA), default='coherence',
+                        help='how --sweep picks the best topic count')
+    parser.add_argument('--workers', type=int, help='processes for --sweep (default: one per topic count)')
+    args = parser.parse_args()
+
+    logging.info("Loading data...")
+    doc_terms = texts = None
+    if args.chunk_size:
+        # Hold only the keys, versions and titles; abstracts are streamed from the table when needed
+        columns = next(iter_stage_table(WITH_SENTIMENT, 1)).columns
+        df = read_stage_table(WITH_SENTIMENT, [column for column in ('arxiv_id', 'updated', 'title')
+                                               if column in columns])
+        doc_terms = lambda: stream_doc_term_matrix(WITH_SENTIMENT, 'processed_abstract',
+                                                   paper_keys(df), args.chunk_size)
+        texts = lambda rows: stage_table_rows(WITH_SENTIMENT, 'processed_abstract', rows.index, args.chunk_size)
+    else:
+        df = read_stage_table(WITH_SENTIMENT)
+    
+    logging.info("Performing topic modeling...")
+    if args.sweep:
+        doc_term_matrix, feature_names = (doc_terms() if doc_terms
+                                          else dataframe_doc_terms(df, 'processed_abstract'))
+        logging.info(f"Sweeping topic counts {sorted(set(args.sweep))}...")
+        backend = args.backend or DEFAULT_LDA_BACKEND
+        results = sweep_topic_counts(doc_term_matrix, args.sweep, args.workers, backend)
+        best = select_topic_count(results, args.criterion)
+        print_sweep(results, best)
+        topic_model = TopicModel(best['num_topics'], backend=backend)
+        topic_model.fit(df, doc_term_matrix, feature_names, fitted=(best['model'], best['doc_topics']))
+        df = run_topic_modeling(df, args.model, topic_model)
+    else:
+        df = run_topic_modeling(df, args.model, num_topics=args.num_topics, refit=args.refit,
+                                doc_terms=doc_terms, backend=args.backend, texts=texts)
+    if args.chunk_size:
+        with StageTableWriter(WITH_TOPICS, schema=stage_table_schema(WITH_SENTIMENT)) as writer:
+            start = 0
+            for chunk in iter_stage_table(WITH_SENTIMENT, args.chunk_size):
+                topics = df.iloc[start:start + len(chunk)]
+                writer.write(chunk.assign(assigned_topic=topics['assigned_topic'].to_numpy(),
+                                          topic_name=topics['topic_name'].to_numpy()))
+                start += len(chunk)
+    else:
+        write_stage_table(df, WITH_TOPICS)
     
     logging.info("Analysis complete!")
\ No newline at end of file
@@ -1,9 +1,19 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
 import seaborn as sns
 from datetime import datetime
+from time import perf_counter
+import argparse
+import json
 import logging
+import os
+from storageV3 import (WITH_TOPICS, PLOT_CUBE, PLOT_HISTOGRAMS, read_stage_table, iter_stage_table,
+                       stage_table_exists, write_stage_table)
+from paperCacheV3 import fingerprint
+from parallelV3 import process_pool
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
@@ -16,86 +26,227 @@ SENTIMENT_COLORS = {
     'Strong Positive': '#006400'     # dark green
 }
 
+# The only columns the plots read from the topic-stage table
+PLOT_COLUMNS = ['published', 'sentiment_category', 'compound_score', 'technical_confidence',
+                'result_strength', 'citation_impact', 'topic_name']
+
+CUBE_DIMENSIONS = ['year', 'topic_name', 'sentiment_category']
+
+# Fixed histogram bins of the score metrics: (low, high, number of bins)
+HISTOGRAM_BINS = {
+    'technical_confidence': (-1.0, 1.0, 100),
+    'result_strength': (0.0, 1.0, 100),
+    'citation_impact': (0.0, 1.0, 100),
+}
+# Pre-binned histograms drawn by the score plots, by name: the metrics along each axis
+HISTOGRAMS = {
+    'technical_confidence': ('technical_confidence',),
+    'result_strength_impact': ('result_strength', 'citation_impact'),
+}
+
+# Bump when any chart's drawing code changes, so every figure is redrawn once
+FIGURE_VERSION = 2
+# Input fingerprint of each rendered figure, used to skip figures that are already current
+FIGURE_FINGERPRINTS_PATH = 'figure_fingerprints.json'
+
 # Colors will be dynamically assigned to topics based on names in the data
 TOPIC_COLORS = {}
 
-def assign_topic_colors(df):
+def aggregate_plot_cube(df):
+    """Year x topic x sentiment category paper counts and compound score sums.
+
+    The cube's size depends on the number of distinct years, topics and
+    categories, not on the corpus. Papers without a year or topic are kept
+    under a missing key.
+    """
+    keys = pd.DataFrame({
+        'year': pd.to_datetime(df['published']).dt.year,
+        'topic_name': df['topic_name'],
+        'sentiment_category': df['sentiment_category'],
+    })
+    keys['papers'] = 1
+    keys['compound_score_sum'] = df['compound_score'].to_numpy(dtype=np.float64)
+    return combine_plot_cubes([keys])
+
+def combine_plot_cubes(cubes):
+    """Merge partial cubes (or per-paper rows) into one, summing matching cells."""
+    cube = pd.concat(cubes, ignore_index=True)
+    for column in ('topic_name', 'sentiment_category'):
+        cube[column] = cube[column].astype(str).where(cube[column].notna())
+    return (cube.groupby(CUBE_DIMENSIONS, dropna=False, sort=True)[['papers', 'compound_score_sum']]
+            .sum().reset_index())
+
+def bin_indices(values, metric):
+    """Histogram bin of each value; values outside the range go to the first or last bin."""
+    low, high, bins = HISTOGRAM_BINS[metric]
+    # Snap positions to the nearest edge first: scores such as 0.7 sit exactly on an
+    # edge, and float32 storage would otherwise drop some of them into the bin below
+    positions = np.round((values - low) / (high - low) * bins, 4)
+    return np.clip(np.floor(positions), 0, bins - 1).astype(np.intp)
+
+def bin_edges(metric):
+    low, high, bins = HISTOGRAM_BINS[metric]
+    return np.linspace(low, high, bins + 1)
+
+class BinnedHistograms:
+    """1-D and 2-D paper counts over fixed metric bins, accumulated chunk by chunk.
+
+    Each chunk is binned with NumPy and added to preallocated count arrays,
+    so memory stays constant however many papers are streamed through, and
+    the score plots draw the counts instead of every paper.
+    """
+    def __init__(self):
+        self.counts = {
+            name: np.zeros([HISTOGRAM_BINS[metric][2] for metric in metrics], dtype=np.int64)
+            for name, metrics in HISTOGRAMS.items()
+        }
+
+    def update(self, df):
+        for name, metrics in HISTOGRAMS.items():
+            values = [df[metric].to_numpy(dtype=np.float64) for metric in metrics]
+            valid = np.logical_and.reduce([np.isfinite(column) for column in values])
+            shape = self.counts[name].shape
+            cells = np.ravel_multi_index(
+                [bin_indices(column[valid], metric) for column, metric in zip(values, metrics)], shape)
+            self.counts[name] += np.bincount(cells, minlength=self.counts[name].size).reshape(shape)
+        return self
+
+    def to_frame(self):
+        """Long table of the non-empty cells, for saving as a stage table."""
+        frames = []
+        for name, counts in self.counts.items():
+            cells = np.nonzero(counts)
+            frames.append(pd.DataFrame({
+                'histogram': name,
+                'x_bin': cells[0].astype(np.int16),
+                'y_bin': (cells[1] if counts.ndim > 1 else np.full(len(cells[0]), -1)).astype(np.int16),
+                'papers': counts[cells],
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def from_frame(cls, frame):
+        histograms = cls()
+        for name, cells in frame.groupby('histogram', observed=True):
+            counts = histograms.counts[name]
+            index = (cells['x_bin'].to_numpy(),) if counts.ndim == 1 else (
+                cells['x_bin'].to_numpy(), cells['y_bin'].to_numpy())
+            counts[index] = cells['papers'].to_numpy()
+        return histograms
+
+def build_plot_data(name=WITH_TOPICS, chunk_size=None):
+    """Build the plot cube and the score histograms in one pass over a stage table.
+
+    With chunk_size, the table is read chunk by chunk and each chunk is
+    folded into running totals, so memory stays constant and the pass is
+    linear in the number of papers.
+    """
+    if chunk_size is None:
+        return aggregate_plot_data([read_stage_table(name, columns=PLOT_COLUMNS)])
+    return aggregate_plot_data(iter_stage_table(name, chunk_size, columns=PLOT_COLUMNS))
+
+def aggregate_plot_data(chunks):
+    """Plot cube and score histograms of an iterable of paper DataFrames."""
+    cube, histograms = None, BinnedHistograms()
+    for chunk in chunks:
+        partial = aggregate_plot_cube(chunk)
+        cube = partial if cube is None else combine_plot_cubes([cube, partial])
+        histograms.update(chunk)
+    return cube, histograms
+
+def assign_topic_colors(cube):
     """Dynamically assign colors to topics from color palette"""
-    unique_topics = df['topic_name'].unique()
+    unique_topics = cube['topic_name'].dropna().unique()
     palette = sns.color_palette("husl", n_colors=len(unique_topics))
     return dict(zip(unique_topics, palette))
 
-def plot_sentiment_distribution(df):
-    plt.figure(figsize=(10, 6))
+def sentiment_distribution_data(cube):
     order = ['Strong Negative', 'Moderate Negative', 'Neutral', 
              'Moderate Positive', 'Strong Positive']
+    counts = cube.groupby('sentiment_category')['papers'].sum().reindex(order, fill_value=0)
+    return pd.DataFrame({'papers': counts, 'share': counts / cube['papers'].sum()})
+
+def plot_sentiment_distribution(data, topic_colors=None):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
     
-    sentiment_counts = df['sentiment_category'].value_counts()
-    total = len(df)
-    
-    ax = sns.barplot(x=order, 
-                    y=[sentiment_counts.get(cat, 0) for cat in order],
-                    palette=[SENTIMENT_COLORS[cat] for cat in order])
+    sns.barplot(x=list(data.index), y=data['papers'].to_numpy(),
+                palette=[SENTIMENT_COLORS[cat] for cat in data.index], ax=ax)
     
-    for p in ax.patches:
-        percentage = f'{100 * p.get_height() / total:.1f}%'
-        ax.annotate(percentage, (p.get_x() + p.get_width()/2., p.get_height()),
+    for p, share in zip(ax.patches, data['share']):
+        ax.annotate(f'{100 * share:.1f}%', (p.get_x() + p.get_width()/2., p.get_height()),
                    ha='center', va='bottom')
     
-    plt.title('Distribution of Sentiment in Research Papers')
-    plt.xlabel('Sentiment Category')
-    plt.ylabel('Number of Papers')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig('sentiment_distribution.png')
-    plt.close()
-
-def plot_sentiment_over_time(df):
-    df['year'] = pd.to_datetime(df['published']).dt.year
-    yearly_sentiment = df.groupby('year')['compound_score'].mean().reset_index()
-    
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=yearly_sentiment, x='year', y='compound_score', marker='o')
-    plt.title('Average Sentiment Over Time')
-    plt.xlabel('Year')
-    plt.ylabel('Average Sentiment Score')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('sentiment_over_time.png')
-    plt.close()
-
-def plot_technical_confidence(df):
-    plt.figure(figsize=(10, 6))
-    sns.histplot(data=df, x='technical_confidence', bins=20)
-    plt.title('Distribution of Technical Confidence')
-    plt.xlabel('Technical Confidence Score')
-    plt.ylabel('Count')
-    plt.tight_layout()
-    plt.savefig('technical_confidence.png')
-    plt.close()
-
-def plot_result_strength_impact(df):
-    plt.figure(figsize=(10, 6))
-    plt.hexbin(df['result_strength'], df['citation_impact'],
-               gridsize=20, cmap='YlOrRd', mincnt=1)
-    plt.colorbar(label='Number of Papers')
-    
-    plt.title('Result Strength vs Citation Impact')
-    plt.xlabel('Result Strength')
-    plt.ylabel('Citation Impact')
-    plt.tight_layout()
-    plt.savefig('result_strength_impact.png')
-    plt.close()
-
-def plot_publication_trend(df):
+    ax.set_title('Distribution of Sentiment in Research Papers')
+    ax.set_xlabel('Sentiment Category')
+    ax.set_ylabel('Number of Papers')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+def sentiment_over_time_data(cube):
+    yearly = cube.groupby('year')[['compound_score_sum', 'papers']].sum()
+    return (yearly['compound_score_sum'] / yearly['papers']).rename('compound_score').reset_index()
+
+def plot_sentiment_over_time(data, topic_colors=None):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    sns.lineplot(data=data, x='year', y='compound_score', marker='o', ax=ax)
+    ax.set_title('Average Sentiment Over Time')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Average Sentiment Score')
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+def technical_confidence_data(histograms):
+    return pd.DataFrame({'papers': histograms.counts['technical_confidence']})
+
+def plot_technical_confidence(data, topic_colors=None):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.stairs(data['papers'].to_numpy(), bin_edges('technical_confidence'),
+              fill=True, alpha=0.75, color=sns.color_palette()[0])
+    ax.stairs(data['papers'].to_numpy(), bin_edges('technical_confidence'), color='black', linewidth=0.8)
+    ax.set_title('Distribution of Technical Confidence')
+    ax.set_xlabel('Technical Confidence Score')
+    ax.set_ylabel('Count')
+    fig.tight_layout()
+    return fig
+
+def result_strength_impact_data(histograms):
+    """Paper counts with result strength bins as rows and citation impact bins as columns."""
+    return pd.DataFrame(histograms.counts['result_strength_impact'])
+
+def plot_result_strength_impact(data, topic_colors=None):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    # Empty bins are left blank, as hexbin's mincnt=1 did
+    mesh = ax.pcolormesh(bin_edges('result_strength'), bin_edges('citation_impact'),
+                         np.ma.masked_equal(data.to_numpy().T, 0), cmap='YlOrRd')
+    fig.colorbar(mesh, ax=ax, label='Number of Papers')
+    
+    ax.set_title('Result Strength vs Citation Impact')
+    ax.set_xlabel('Result Strength')
+    ax.set_ylabel('Citation Impact')
+    fig.tight_layout()
+    return fig
+
+def publication_trend_data(cube):
+    data = cube.groupby('year')['papers'].sum().sort_index().to_frame()
+    # Papers without a year still count towards the total
+    data.attrs['total'] = int(cube['papers'].sum())
+    return data
+
+def plot_publication_trend(data, topic_colors=None):
     """Visualize the number of publications over time with enhanced styling"""
-    df['year'] = pd.to_datetime(df['published']).dt.year
-    yearly_counts = df['year'].value_counts().sort_index()
+    yearly_counts = data['papers']
     
-    plt.figure(figsize=(12, 6))
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
     
     # Create line plot with points
-    plt.plot(yearly_counts.index, yearly_counts.values, 
+    ax.plot(yearly_counts.index, yearly_counts.values, 
             marker='o', color='#2E86C1', linewidth=2, markersize=8)
     
     # Calculate year-over-year growth
@@ -104,110 +255,205 @@ def plot_publication_trend(df):
     # Annotate with growth rates
     for i in range(1, len(yearly_counts)):
         if not np.isnan(yoy_growth.iloc[i]):
-            plt.annotate(f'{yoy_growth.iloc[i]:.1f}%', 
+            ax.annotate(f'{yoy_growth.iloc[i]:.1f}%', 
                         (yearly_counts.index[i], yearly_counts.iloc[i]),
                         textcoords="offset points", 
                         xytext=(0,10), 
                         ha='center')
     
-    plt.title('Number of Publications Over Time')
-    plt.xlabel('Year')
-    plt.ylabel('Number of Publications')
-    plt.grid(True, alpha=0.3)
+    ax.set_title('Number of Publications Over Time')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Number of Publications')
+    ax.grid(True, alpha=0.3)
     
     # Add total publications count
-    total_pubs = len(df)
-    plt.text(0.02, 0.98, f'Total Publications: {total_pubs:,}',
-             transform=plt.gca().transAxes,
-             bbox=dict(facecolor='white', alpha=0.8, edgecolor='none'))
-    
-    plt.tight_layout()
-    plt.savefig('publication_trend.png')
-    plt.close()
-
-def plot_topic_distribution(df, topic_colors):
-    plt.figure(figsize=(12, 6))
-    topic_counts = df['topic_name'].value_counts()
-    
-    ax = sns.barplot(x=topic_counts.index, y=topic_counts.values,
-                    palette=[topic_colors[topic] for topic in topic_counts.index])
-    
-    total = len(df)
-    for p in ax.patches:
-        percentage = f'{100 * p.get_height() / total:.1f}%'
-        ax.annotate(percentage, (p.get_x() + p.get_width()/2., p.get_height()),
-                   ha='center', va='bottom')
-    
-    plt.title('Distribution of Research Topics')
-    plt.xlabel('Topic')
-    plt.ylabel('Number of Papers')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig('topic_distribution.png')
-    plt.close()
-
-def plot_topics_over_time(df, topic_colors):
-    df['year'] = pd.to_datetime(df['published']).dt.year
-    topic_year_counts = df.groupby(['year', 'topic_name']).size().unstack(fill_value=0)
-    topic_year_props = topic_year_counts.div(topic_year_counts.sum(axis=1), axis=0)
-    
-    plt.figure(figsize=(12, 6))
-    for topic in topic_year_props.columns:
-        plt.plot(topic_year_props.index, topic_year_props[topic],
-                marker='o', label=topic, color=topic_colors[topic])
+    ax.text(0.02, 0.98, f"Total Publications: {data.attrs['total']:,}",
+            transform=ax.transAxes,
+            bbox=dict(facecolor='white', alpha=0.8, edgecolor='none'))
     
-    plt.title('Topic Proportions Over Time')
-    plt.xlabel('Year')
-    plt.ylabel('Proportion of Topics')
-    plt.legend(title='Topic', bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('topics_over_time.png')
-    plt.close()
+    fig.tight_layout()
+    return fig
 
-def plot_topic_sentiment_correlation(df, topic_colors):
-    topic_sentiment = df.groupby('topic_name')['compound_score'].mean().reset_index()
+def topic_distribution_data(cube):
+    counts = cube.groupby('topic_name')['papers'].sum().sort_values(ascending=False, kind='stable')
+    return pd.DataFrame({'papers': counts, 'share': counts / cube['papers'].sum()})
+
+def plot_topic_distribution(data, topic_colors):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
     
-    plt.figure(figsize=(10, 6))
-    ax = sns.barplot(x='topic_name', y='compound_score', data=topic_sentiment,
-                    palette=[topic_colors[topic] for topic in topic_sentiment['topic_name']])
+    sns.barplot(x=list(data.index), y=data['papers'].to_numpy(),
+                palette=[topic_colors[topic] for topic in data.index], ax=ax)
     
-    plt.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
+    for p, share in zip(ax.patches, data['share']):
+        ax.annotate(f'{100 * share:.1f}%', (p.get_x() + p.get_width()/2., p.get_height()),
+                   ha='center', va='bottom')
     
-    # Add sentiment level indicators
-    plt.text(plt.xlim()[1], 0.3, 'Strong Positive (>0.3)', ha='right')
-    plt.text(plt.xlim()[1], 0.1, 'Moderate Positive (0.1-0.3)', ha='right')
-    plt.text(plt.xlim()[1], 0, 'Neutral (-0.1-0.1)', ha='right')
-    plt.text(plt.xlim()[1], -0.2, 'Moderate Negative (-0.3--0.1)', ha='right')
-    plt.text(plt.xlim()[1], -0.4, 'Strong Negative (<-0.3)', ha='right')
-    
-    plt.title('Average Sentiment by Topic')
-    plt.xlabel('Topic')
-    plt.ylabel('Average Sentiment Score')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig('topic_sentiment_correlation.png')
-    plt.close()
+    ax.set_title('Distribution of Research Topics')
+    ax.set_xlabel('Topic')
+    ax.set_ylabel('Number of Papers')
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+    return fig
 
-if __name__ == "__main__":
-    logging.info("Loading data...")
-    df = pd.read_csv('arxiv_semiconductors_with_topics.csv')
+def topics_over_time_data(cube):
+    topic_year_counts = cube.groupby(['year', 'topic_name'])['papers'].sum().unstack(fill_value=0)
+    return topic_year_counts.div(topic_year_counts.sum(axis=1), axis=0)
+
+def plot_topics_over_time(data, topic_colors):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    for topic in data.columns:
+        ax.plot(data.index, data[topic],
+                marker='o', label=topic, color=topic_colors[topic])
     
-    # Assign colors to topics
-    topic_colors = assign_topic_colors(df)
+    ax.set_title('Topic Proportions Over Time')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Proportion of Topics')
+    ax.legend(title='Topic', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+def topic_sentiment_correlation_data(cube):
+    by_topic = cube.groupby('topic_name')[['compound_score_sum', 'papers']].sum()
+    return (by_topic['compound_score_sum'] / by_topic['papers']).rename('compound_score').reset_index()
+
+def plot_topic_sentiment_correlation(data, topic_colors):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sns.barplot(x='topic_name', y='compound_score', data=data,
+                palette=[topic_colors[topic] for topic in data['topic_name']], ax=ax)
+    
+    ax.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
     
-    logging.info("Creating sentiment visualizations...")
-    plot_sentiment_distribution(df)
-    plot_sentiment_over_time(df)
-    plot_technical_confidence(df)
-    plot_result_strength_impact(df)
+    # Add sentiment level indicators
+    right = ax.get_xlim()[1]
+    ax.text(right, 0.3, 'Strong Positive (>0.3)', ha='right')
+    ax.text(right, 0.1, 'Moderate Positive (0.1-0.3)', ha='right')
+    ax.text(right, 0, 'Neutral (-0.1-0.1)', ha='right')
+    ax.text(right, -0.2, 'Moderate Negative (-0.3--0.1)', ha='right')
+    ax.text(right, -0.4, 'Strong Negative (<-0.3)', ha='right')
     
-    logging.info("Creating publication trend visualization...")
-    plot_publication_trend(df)
+    ax.set_title('Average Sentiment by Topic')
+    ax.set_xlabel('Topic')
+    ax.set_ylabel('Average Sentiment Score')
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+    return fig
+
+# Figure name (and PNG file name) -> (plot data it reads, input extraction, drawing function)
+FIGURES = {
+    'sentiment_distribution': ('cube', sentiment_distribution_data, plot_sentiment_distribution),
+    'sentiment_over_time': ('cube', sentiment_over_time_data, plot_sentiment_over_time),
+    'technical_confidence': ('histograms', technical_confidence_data, plot_technical_confidence),
+    'result_strength_impact': ('histograms', result_strength_impact_data, plot_result_strength_impact),
+    'publication_trend': ('cube', publication_trend_data, plot_publication_trend),
+    'topic_distribution': ('cube', topic_distribution_data, plot_topic_distribution),
+    'topics_over_time': ('cube', topics_over_time_data, plot_topics_over_time),
+    'topic_sentiment_correlation': ('cube', topic_sentiment_correlation_data, plot_topic_sentiment_correlation),
+}
+TOPIC_FIGURES = {'topic_distribution', 'topics_over_time', 'topic_sentiment_correlation'}
+
+def figure_fingerprint(name, data, topic_colors):
+    """Hash of everything a figure is drawn from: its input data, colors and FIGURE_VERSION."""
+    colors = topic_colors if name in TOPIC_FIGURES else None
+    return fingerprint(FIGURE_VERSION, name, data.to_json(orient='split'), data.attrs, colors)
+
+def load_figure_fingerprints(path=FIGURE_FINGERPRINTS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_figure_fingerprints(fingerprints, path=FIGURE_FINGERPRINTS_PATH):
+    with open(path, 'w') as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+
+def _render_figure(task):
+    """Draw one figure to <name>.png; returns (name, seconds). Runs in a worker process."""
+    name, data, topic_colors = task
+    start = perf_counter()
+    fig = FIGURES[name][2](data, topic_colors)
+    fig.savefig(f'{name}.png')
+    return name, perf_counter() - start
+
+def _render_all(tasks, workers=None):
+    if workers == 1 or len(tasks) <= 1:
+        yield from map(_render_figure, tasks)
+        return
+    with process_pool(min(workers or os.cpu_count(), len(tasks))) as pool:
+        yield from pool.map(_render_figure, tasks)
+
+def render_figures(cube, histograms, workers=None, force=False):
+    """Render every figure whose input changed, one process per figure.
+
+    Each figure's input data is fingerprinted and compared with the
+    fingerprint recorded when its PNG was last written; figures that are
+    still current are skipped unless force is set. Figures are drawn with
+    the Figure API on the Agg backend, so they share no pyplot state and
+    can render in parallel. Returns {name: render seconds}.
+    """
+    topic_colors = assign_topic_colors(cube)
+    sources = {'cube': cube, 'histograms': histograms}
+    fingerprints = load_figure_fingerprints()
+    tasks, current = [], {}
+    for name, (source, data_function, _) in FIGURES.items():
+        data = data_function(sources[source])
+        current[name] = figure_fingerprint(name, data, topic_colors)
+        if force or fingerprints.get(name) != current[name] or not os.path.exists(f'{name}.png'):
+            tasks.append((name, data, topic_colors))
+    logging.info(f"{len(tasks)} of {len(FIGURES)} figures changed; "
+                 f"skipping {', '.join(sorted(set(FIGURES) - {task[0] for task in tasks})) or 'none'}")
+
+    timings = {}
+    start = perf_counter()
+    try:
+        for name, seconds in _render_all(tasks, workers):
+            timings[name] = seconds
+            fingerprints[name] = current[name]
+            logging.info(f"Rendered {name}.png in {seconds:.2f}s")
+    finally:
+        # Figures drawn before a failure stay current
+        save_figure_fingerprints(fingerprints)
+    if timings:
+        logging.info(f"Rendered {len(timings)} figures in {perf_counter() - start:.2f}s "
+                     f"(slowest: {max(timings.values()):.2f}s)")
+    return timings
+
+def run_visualization(df=None, chunk_size=None, workers=None, force=False):
+    """Aggregate the topic-stage papers (df, or the saved table), save the plot data and render the figures."""
+    logging.info("Aggregating data...")
+    if df is None:
+        cube, histograms = build_plot_data(WITH_TOPICS, chunk_size)
+    else:
+        cube, histograms = aggregate_plot_data([df[PLOT_COLUMNS]])
+    write_stage_table(cube, PLOT_CUBE)
+    write_stage_table(histograms.to_frame(), PLOT_HISTOGRAMS)
     
-    logging.info("Creating topic visualizations...")
-    plot_topic_distribution(df, topic_colors)
-    plot_topics_over_time(df, topic_colors)
-    plot_topic_sentiment_correlation(df, topic_colors)
+    logging.info("Creating visualizations...")
+    render_figures(cube, histograms, workers, force)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Plot sentiment and topic trends.')
+    parser.add_argument('--from-cube', action='store_true',
+                        help='redraw from the saved plot cube and histograms without reading the paper table')
+    parser.add_argument('--chunk-size', type=int, help='read the paper table in chunks of this many papers')
+    parser.add_argument('--workers', type=int, help='figure render processes (default: one per changed figure, up to the CPU count)')
+    parser.add_argument('--force', action='store_true', help='redraw every figure, even if its inputs are unchanged')
+    args = parser.parse_args()
+
+    if args.from_cube and stage_table_exists(PLOT_CUBE) and stage_table_exists(PLOT_HISTOGRAMS):
+        logging.info("Loading plot cube and histograms...")
+        cube = read_stage_table(PLOT_CUBE)
+        histograms = BinnedHistograms.from_frame(read_stage_table(PLOT_HISTOGRAMS))
+        logging.info("Creating visualizations...")
+        render_figures(cube, histograms, args.workers, args.force)
+    else:
+        run_visualization(chunk_size=args.chunk_size, workers=args.workers, force=args.force)
     
-    logging.info("All visualizations completed!")
\ No newline at end of file
+    logging.info("All visualizations completed!")
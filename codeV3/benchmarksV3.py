@@ -0,0 +1,236 @@
+"""Benchmarks for the pipeline stages.
+
+Run from the codeV3 directory, for example:
+    python benchmarksV3.py parser saved_pages/
+    python benchmarksV3.py parser arxiv_harvest_cache.sqlite
+    python benchmarksV3.py preprocess --limit 2000
+    python benchmarksV3.py preprocess-scaling --workers 1 2 4 8 16
+    python benchmarksV3.py startup --runs 5
+    python benchmarksV3.py sentiment-scaling --workers 1 2 4 8 16
+    python benchmarksV3.py lda-backends --topics 5
+"""
+import argparse
+import statistics
+import subprocess
+import glob
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+from bs4 import XMLParsedAsHTMLWarning
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+from storageV3 import RAW_PAPERS, PREPROCESSED, WITH_SENTIMENT, read_stage_table
+from pipelineV3 import load_stage
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _time_pages(parse, pages):
+    start = time.perf_counter()
+    entries = sum(len(parse(page)) for page in pages)
+    return time.perf_counter() - start, entries
+
+def _peak_memory(parse, pages):
+    """Largest traced allocation peak while parsing any single page."""
+    peak = 0
+    tracemalloc.start()
+    for page in pages:
+        tracemalloc.reset_peak()
+        parse(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return peak
+
+def benchmark_parser(args):
+    collection = load_stage('1DataCollectionV3.py')
+    if os.path.isdir(args.pages):
+        pages = [open(path, 'rb').read() for path in sorted(glob.glob(os.path.join(args.pages, '*.xml')))]
+    else:
+        cache = collection.HarvestCache(args.pages)
+        pages = list(cache.iter_pages())
+        cache.close()
+    if not pages:
+        raise SystemExit(f"No feed pages found in {args.pages}")
+
+    parsers = {
+        'BeautifulSoup': collection.parse_arxiv_response_soup,
+        'lxml iterparse': collection.parse_arxiv_response,
+    }
+    warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+    mismatches = sum(collection.parse_arxiv_response_soup(page) != collection.parse_arxiv_response(page)
+                     for page in pages)
+
+    print(f"{len(pages)} pages, {sum(len(page) for page in pages) / 1e6:.1f} MB of feed XML")
+    print(f"{'parser':<16}{'entries':>9}{'seconds':>10}{'pages/s':>10}{'peak MB/page':>14}")
+    for name, parse in parsers.items():
+        seconds, entries = min(_time_pages(parse, pages) for _ in range(args.repeat))
+        peak = _peak_memory(parse, pages)
+        print(f"{name:<16}{entries:>9}{seconds:>10.3f}{len(pages) / seconds:>10.1f}{peak / 1e6:>14.2f}")
+    print(f"Pages with differing output: {mismatches}")
+
+def _legacy_preprocess_text(stage, text):
+    """preprocess_text as it ran before PreprocessingEngine, with per-call setup."""
+    if isinstance(text, float):
+        return ""
+    tokens = stage.word_tokenize(
+        stage.re.sub(r'http\S+|www\S+|\[.*?\]|\(.*?\)', '', stage.protect_compounds(text.lower())))
+    stop_words = set(stopwords.words('english')).union(stage.TECHNICAL_STOPWORDS)
+    filtered_tokens = [
+        token for token, pos in nltk.pos_tag(tokens)
+        if '_' in token or (token not in stop_words and len(token) > 2 and
+                            (pos.startswith(('NN', 'JJ')) or '-' in token or
+                             any(char.isdigit() for char in token)))
+    ]
+    lemmatizer = WordNetLemmatizer()
+    return stage.restore_compounds(' '.join(lemmatizer.lemmatize(token) for token in filtered_tokens))
+
+def _docs_per_second(func, texts):
+    start = time.perf_counter()
+    output = func(texts)
+    return len(texts) / (time.perf_counter() - start), output
+
+def benchmark_preprocess(args):
+    preprocessing = load_stage('2TextPreprocessingV3.py')
+    texts = read_stage_table(args.input, columns=['abstract'])['abstract'].iloc[:args.limit]
+    engine = preprocessing.PreprocessingEngine()
+
+    paths = {
+        'per-document (legacy)': lambda batch: [_legacy_preprocess_text(preprocessing, text) for text in batch],
+        'engine, unbatched': lambda batch: [engine.preprocess(text) for text in batch],
+        'engine, batched': lambda batch: preprocessing.preprocess_series(batch, args.batch_size).tolist(),
+    }
+    print(f"{len(texts)} abstracts from {args.input}")
+    print(f"{'path':<24}{'docs/sec':>10}{'identical':>11}")
+    baseline = None
+    for name, func in paths.items():
+        rate, output = _docs_per_second(func, texts)
+        baseline = baseline or output
+        print(f"{name:<24}{rate:>10.1f}{str(output == baseline):>11}")
+
+def benchmark_preprocess_scaling(args):
+    preprocessing = load_stage('2TextPreprocessingV3.py')
+    df = read_stage_table(args.input, columns=['title', 'abstract']).iloc[:args.limit]
+    columns = ['processed_title', 'processed_abstract', 'technical_phrases']
+
+    print(f"{len(df)} papers from {args.input}, chunks of {args.chunk_size}")
+    print(f"{'workers':>8}{'seconds':>10}{'docs/sec':>10}{'speedup':>9}{'identical':>11}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        output = preprocessing.preprocess_dataframe(df.copy(), workers=workers, chunk_size=args.chunk_size)
+        seconds = time.perf_counter() - start
+        output = output[columns].to_dict('list')
+        if baseline is None:
+            baseline, baseline_seconds = output, seconds
+        print(f"{workers:>8}{seconds:>10.2f}{len(df) / seconds:>10.1f}"
+              f"{baseline_seconds / seconds:>9.2f}{str(output == baseline):>11}")
+
+def benchmark_sentiment_scaling(args):
+    sentiment = load_stage('3SentimentAnalysisV3.py')
+    texts = read_stage_table(args.input, columns=['abstract'])['abstract'].iloc[:args.limit].tolist()
+
+    print(f"{len(texts)} abstracts from {args.input}, chunks of {args.chunk_size}")
+    print(f"{'workers':>8}{'seconds':>10}{'docs/sec':>10}{'speedup':>9}{'identical':>11}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        output = sentiment.analyze_texts(texts, workers=workers, chunk_size=args.chunk_size)
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline, baseline_seconds = output, seconds
+        print(f"{workers:>8}{seconds:>10.2f}{len(texts) / seconds:>10.1f}"
+              f"{baseline_seconds / seconds:>9.2f}{str(output.tobytes() == baseline.tobytes()):>11}")
+
+def benchmark_lda_backends(args):
+    topics = load_stage('4TopicModelingV3.py')
+    df = read_stage_table(args.input, columns=['processed_abstract']).iloc[:args.limit]
+    doc_term_matrix, _ = topics.dataframe_doc_terms(df, 'processed_abstract')
+
+    print(f"{doc_term_matrix.shape[0]} abstracts x {doc_term_matrix.shape[1]} terms from {args.input}, "
+          f"{args.topics} topics")
+    print(f"{'backend':<10}{'seconds':>9}{'perplexity':>12}{'coherence':>11}")
+    for backend in args.backends:
+        start = time.perf_counter()
+        model, _ = topics.perform_lda(doc_term_matrix, args.topics, backend=backend)
+        seconds = time.perf_counter() - start
+        print(f"{backend:<10}{seconds:>9.2f}{topics.word_perplexity(model, doc_term_matrix):>12.1f}"
+              f"{topics.umass_coherence(model, doc_term_matrix):>11.3f}")
+
+# Run in a fresh interpreter: time from before importing the preprocessing
+# stage until its first processed document
+_STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import importlib.util, sys
+sys.path.insert(0, {code_dir!r})
+spec = importlib.util.spec_from_file_location('preprocessing', {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+module.preprocess_text('We demonstrate a quantum dot laser with a tunable band gap.')
+print(imported - started, time.perf_counter() - started)
+"""
+
+def benchmark_startup(args):
+    script = _STARTUP_SCRIPT.format(code_dir=CODE_DIR,
+                                    path=os.path.join(CODE_DIR, '2TextPreprocessingV3.py'))
+    import_times, first_doc_times = [], []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+        if result.returncode:
+            raise SystemExit(result.stderr.strip().splitlines()[-1])
+        import_seconds, first_doc_seconds = map(float, result.stdout.split()[-2:])
+        import_times.append(import_seconds)
+        first_doc_times.append(first_doc_seconds)
+    print(f"Cold start over {args.runs} fresh interpreters (median seconds):")
+    print(f"  import preprocessing stage:  {statistics.median(import_times):.3f}")
+    print(f"  first processed document:    {statistics.median(first_doc_times):.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stages.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    parser_bench = subparsers.add_parser('parser', help='BeautifulSoup vs streaming Atom parser')
+    parser_bench.add_argument('pages', help='directory of saved feed pages (*.xml) or a harvest cache file')
+    parser_bench.add_argument('--repeat', type=int, default=3, help='timing repetitions (best is reported)')
+    parser_bench.set_defaults(run=benchmark_parser)
+
+    preprocess_bench = subparsers.add_parser('preprocess', help='preprocessing throughput in docs/sec')
+    preprocess_bench.add_argument('--input', default=RAW_PAPERS, help='stage table holding an abstract column')
+    preprocess_bench.add_argument('--limit', type=int, default=2000, help='number of abstracts to process')
+    preprocess_bench.add_argument('--batch-size', type=int, default=512, help='documents per tagging batch')
+    preprocess_bench.set_defaults(run=benchmark_preprocess)
+
+    scaling_bench = subparsers.add_parser('preprocess-scaling', help='parallel preprocessing speedup by worker count')
+    scaling_bench.add_argument('--input', default=RAW_PAPERS, help='stage table holding title and abstract columns')
+    scaling_bench.add_argument('--limit', type=int, default=20000, help='number of papers to process')
+    scaling_bench.add_argument('--chunk-size', type=int, default=512, help='papers per worker task')
+    scaling_bench.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                               help='worker counts to time; the first is the baseline')
+    scaling_bench.set_defaults(run=benchmark_preprocess_scaling)
+
+    startup_bench = subparsers.add_parser('startup', help='cold start to first preprocessed document')
+    startup_bench.add_argument('--runs', type=int, default=5, help='fresh interpreters to time')
+    startup_bench.set_defaults(run=benchmark_startup)
+
+    sentiment_bench = subparsers.add_parser('sentiment-scaling', help='parallel sentiment scoring speedup by worker count')
+    sentiment_bench.add_argument('--input', default=PREPROCESSED, help='stage table holding an abstract column')
+    sentiment_bench.add_argument('--limit', type=int, default=100000, help='number of abstracts to score')
+    sentiment_bench.add_argument('--chunk-size', type=int, default=256, help='abstracts per worker task')
+    sentiment_bench.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                                 help='worker counts to time; the first is the baseline')
+    sentiment_bench.set_defaults(run=benchmark_sentiment_scaling)
+
+    lda_bench = subparsers.add_parser('lda-backends', help='LDA fit time and topic quality by backend')
+    lda_bench.add_argument('--input', default=WITH_SENTIMENT, help='stage table holding a processed_abstract column')
+    lda_bench.add_argument('--limit', type=int, default=50000, help='number of abstracts to fit on')
+    lda_bench.add_argument('--topics', type=int, default=5, help='number of topics')
+    lda_bench.add_argument('--backends', nargs='+', default=['sklearn', 'gensim'], help='backends to compare')
+    lda_bench.set_defaults(run=benchmark_lda_backends)
+
+    args = parser.parse_args()
+    args.run(args)
@@ -0,0 +1,46 @@
+import re
+
+class CompoundMatcher:
+    """Precompiled single-pass matcher for a set of multi-word compounds.
+
+    All compounds are joined into one alternation, longest first, so at
+    each position the longest compound wins, as with the old sorted
+    replace loop, and each text is scanned once regardless of how many
+    compounds there are.
+    """
+    def __init__(self, compounds):
+        self.compounds = sorted(set(compounds), key=lambda compound: (-len(compound), compound))
+        self.pattern = self._alternation(self.compounds)
+        self.protected_pattern = self._alternation(
+            [compound.replace(' ', '_') for compound in self.compounds])
+        # Overlapping search: the longest compound starting at every position
+        self.overlapping_pattern = re.compile(f"(?=({self.pattern.pattern}))")
+        # Shorter compounds found inside each compound, e.g. 'thin film' in 'thin film transistor'
+        self.contained = {
+            compound: {other for other in self.compounds if other != compound and other in compound}
+            for compound in self.compounds
+        }
+
+    @staticmethod
+    def _alternation(terms):
+        if not terms:
+            return re.compile(r'(?!)')
+        return re.compile('|'.join(re.escape(term) for term in terms))
+
+    def protect(self, text):
+        """Lowercase text and join each compound's words with underscores."""
+        return self.pattern.sub(lambda match: match.group().replace(' ', '_'), text.lower())
+
+    def restore(self, text):
+        """Turn protected compound tokens back into their spaced form."""
+        return self.protected_pattern.sub(lambda match: match.group().replace('_', ' '), text)
+
+    def find_all(self, text):
+        """Set of compounds occurring anywhere in text, overlapping matches included."""
+        found = set()
+        for match in self.overlapping_pattern.finditer(text):
+            compound = match.group(1)
+            if compound not in found:
+                found.add(compound)
+                found |= self.contained[compound]
+        return found
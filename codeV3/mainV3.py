@@ -1,10 +1,31 @@
-import os
+"""Run the analysis pipeline: collect -> preprocess -> sentiment -> topics -> visualize.
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
+Stages run in one process and pass their output DataFrames along in
+memory. Stages whose code and input are unchanged since their last run
+are skipped. Run from the codeV3 directory, for example:
+    python mainV3.py                     # run every stage that is out of date
+    python mainV3.py --from sentiment    # sentiment, topics and visualize
+    python mainV3.py --only topics       # just topic modeling
+    python mainV3.py --from topics --force
+    python mainV3.py --stream            # preprocess and score papers while harvesting
+"""
+import argparse
+import logging
+from pipelineV3 import STAGE_NAMES, select_stages, run_pipeline, print_report
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
 if __name__ == "__main__":
-    exec(open(os.path.join(current_dir, "1DataCollectionV3.py")).read())
-    exec(open(os.path.join(current_dir, "2TextPreprocessingV3.py")).read())
-    exec(open(os.path.join(current_dir, "3SentimentAnalysisV3.py")).read())
-    exec(open(os.path.join(current_dir, "4TopicModelingV3.py")).read())
-    exec(open(os.path.join(current_dir, "5DataVisualizationV3.py")).read())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Run the semiconductor trends pipeline.')
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument('--from', dest='start', choices=STAGE_NAMES,
+                           help='start at this stage, reading earlier outputs from disk')
+    selection.add_argument('--only', choices=STAGE_NAMES, help='run just this stage')
+    parser.add_argument('--force', action='store_true',
+                        help='rerun the selected stages even if their code and inputs are unchanged')
+    parser.add_argument('--stream', action='store_true',
+                        help='overlap collection, preprocessing and sentiment instead of running them one after another')
+    args = parser.parse_args()
+
+    report = run_pipeline(select_stages(args.start, args.only), force=args.force, stream=args.stream)
+    print_report(report)
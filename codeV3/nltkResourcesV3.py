@@ -0,0 +1,55 @@
+import nltk
+from nltk.tag import PerceptronTagger
+
+# NLTK data each capability needs, as (download package, nltk.data path).
+# Newer NLTK releases moved the tokenizer and tagger to new packages.
+NLTK_RESOURCES = {
+    'tokenizer': (('punkt_tab', 'tokenizers/punkt_tab/english/')
+                  if hasattr(nltk.tokenize, 'PunktTokenizer')
+                  else ('punkt', 'tokenizers/punkt/english.pickle')),
+    'tagger': (('averaged_perceptron_tagger_eng', 'taggers/averaged_perceptron_tagger_eng/')
+               if hasattr(PerceptronTagger, 'load_from_json')
+               else ('averaged_perceptron_tagger',
+                     'taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle')),
+    'stopwords': ('stopwords', 'corpora/stopwords/english'),
+    'wordnet': ('wordnet', 'corpora/wordnet'),
+    'vader': ('vader_lexicon', 'sentiment/vader_lexicon.zip'),
+}
+
+PREPROCESSING_RESOURCES = ('tokenizer', 'tagger', 'stopwords', 'wordnet')
+SENTIMENT_RESOURCES = ('vader',)
+
+_found = set()
+
+def require_nltk_data(*resources):
+    """Check that NLTK data is installed locally, without touching the network.
+
+    Each resource is looked up once per process. Missing data raises a
+    LookupError naming the packages and how to install them.
+    """
+    missing = []
+    for resource in resources:
+        if resource in _found:
+            continue
+        package, path = NLTK_RESOURCES[resource]
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(package)
+        else:
+            _found.add(resource)
+    if missing:
+        raise LookupError(
+            f"Missing NLTK data: {', '.join(missing)}. Install it once with "
+            f"`python nltkResourcesV3.py` (or `python -m nltk.downloader {' '.join(missing)}`)."
+        )
+
+def download_nltk_data(resources=tuple(NLTK_RESOURCES)):
+    """Download NLTK data for the given resources; the only step that uses the network."""
+    for resource in resources:
+        nltk.download(NLTK_RESOURCES[resource][0])
+
+if __name__ == "__main__":
+    download_nltk_data()
+    require_nltk_data(*NLTK_RESOURCES)
+    print("All NLTK data installed.")
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+import pickle
+import sqlite3
+from time import time
+
+PAPER_CACHE_PATH = 'paper_cache.sqlite'
+
+def fingerprint(*parts):
+    """Stable hash of stage settings such as a version number and its lexicons.
+
+    Sets are sorted and dict keys ordered, so the hash changes only when the
+    content changes. Including it in every cache key invalidates cached
+    results automatically when a lexicon is edited.
+    """
+    canonical = json.dumps(parts, sort_keys=True, default=sorted)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+class PaperCache:
+    """Persistent per-paper cache of stage outputs, keyed by content hash.
+
+    Keys hash (stage version, title, abstract), so unchanged papers are
+    served from disk on later runs and only new or edited papers are
+    recomputed. The file is kept under max_bytes by evicting the least
+    recently used entries.
+    """
+    def __init__(self, path, stage, version, max_bytes=512 * 1024 * 1024):
+        self.stage = stage
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY, stage TEXT, value BLOB,
+                size INTEGER, last_used REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+    def key(self, title, abstract):
+        content = '\0'.join([self.stage, self.version, str(title), str(abstract)])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys, batch_size=500):
+        """Return {key: value} for the cached keys, counting hits and misses."""
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({placeholders})", batch)
+            found.update((key, pickle.loads(value)) for key, value in rows)
+        with self.conn:
+            self.conn.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                                  [(time(), key) for key in found])
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store {key: value} pairs, then evict old entries if over the size budget."""
+        now = time()
+        rows = []
+        for key, value in items.items():
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, self.stage, blob, len(blob), now))
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", rows)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        stale = []
+        for key, size in self.conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.conn:
+            self.conn.executemany("DELETE FROM results WHERE key = ?", stale)
+        logging.info(f"Evicted {len(stale)} cached results to stay under {self.max_bytes} bytes")
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        logging.info(f"{self.stage} cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate)")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,77 @@
+import importlib
+import importlib.util
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Scripts imported by file path with load_module_file, as {module name: path}
+FILE_MODULES = {}
+
+# Largest peak resident memory of any pool worker since reset_worker_peak, in MB
+_worker_peak_mb = None
+
+def status_mb(pid='self', field='VmHWM'):
+    """A memory figure of a process from /proc/<pid>/status in MB, or None without /proc."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def worker_peak_mb():
+    return _worker_peak_mb
+
+def reset_worker_peak():
+    global _worker_peak_mb
+    _worker_peak_mb = None
+
+class _StagePool(ProcessPoolExecutor):
+    """Process pool that records its workers' peak memory before shutting them down."""
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        global _worker_peak_mb
+        for process in multiprocessing.active_children():
+            peak = status_mb(process.pid)
+            if peak is not None:
+                _worker_peak_mb = max(_worker_peak_mb or 0.0, peak)
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+def load_module_file(name, path):
+    """Import the script at path as module `name`, registered so pool workers can load it too."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    FILE_MODULES[name] = path
+    spec.loader.exec_module(module)
+    return module
+
+def _init_worker(file_modules, initializer, initargs):
+    # A spawned worker starts in a fresh interpreter, which cannot import
+    # file-loaded modules by name, so load them before any task is unpickled
+    for name, path in file_modules.items():
+        load_module_file(name, path)
+    if initializer is not None:
+        module_name, qualname = initializer
+        getattr(importlib.import_module(module_name), qualname)(*initargs)
+
+def process_pool(workers=None, initializer=None, initargs=()):
+    """Process pool for stage work.
+
+    Workers load the scripts imported with load_module_file (as mainV3.py's
+    pipeline runner does) before running initializer(*initargs). They are
+    forked on Linux and spawned elsewhere.
+    """
+    context = multiprocessing.get_context('fork' if sys.platform.startswith('linux') else None)
+    if initializer is not None:
+        initializer = (initializer.__module__, initializer.__qualname__)
+    return _StagePool(max_workers=workers or os.cpu_count(), mp_context=context,
+                      initializer=_init_worker, initargs=(dict(FILE_MODULES), initializer, initargs))
+
+def chunk_slices(length, chunk_size):
+    """Consecutive slices covering range(length), chunk_size items each."""
+    return [slice(start, min(start + chunk_size, length)) for start in range(0, length, chunk_size)]
@@ -0,0 +1,271 @@
+import pandas as pd
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from time import perf_counter
+from paperCacheV3 import PaperCache, PAPER_CACHE_PATH, fingerprint
+from parallelV3 import process_pool, load_module_file, status_mb, worker_peak_mb, reset_worker_peak
+from storageV3 import (RAW_PAPERS, PREPROCESSED, WITH_SENTIMENT, WITH_TOPICS, PLOT_CUBE,
+                       stage_table_path, stage_table_exists, read_stage_table, write_stage_table)
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fingerprint each stage last ran with, used to skip stages that are already current
+PIPELINE_STATE_PATH = 'pipeline_state.json'
+
+# Shared modules whose code is part of every stage's fingerprint
+HELPER_MODULES = ['storageV3.py', 'paperCacheV3.py', 'parallelV3.py', 'compoundsV3.py', 'nltkResourcesV3.py']
+
+class Stage:
+    """A pipeline step: the script defining it, its entry point, and the stage tables it reads and writes.
+
+    The entry point takes the input table as a DataFrame (nothing for the
+    first stage) and returns the output table, or None if it saves its own
+    output. A volatile stage reads outside data, so it runs whenever it is
+    selected.
+    """
+    def __init__(self, name, script, entry_point, input_table, output_table, volatile=False):
+        self.name = name
+        self.script = script
+        self.entry_point = entry_point
+        self.input_table = input_table
+        self.output_table = output_table
+        self.volatile = volatile
+
+STAGES = [
+    Stage('collect', '1DataCollectionV3.py', 'run_collection', None, RAW_PAPERS, volatile=True),
+    Stage('preprocess', '2TextPreprocessingV3.py', 'run_preprocessing', RAW_PAPERS, PREPROCESSED),
+    Stage('sentiment', '3SentimentAnalysisV3.py', 'run_sentiment', PREPROCESSED, WITH_SENTIMENT),
+    Stage('topics', '4TopicModelingV3.py', 'run_topic_modeling', WITH_SENTIMENT, WITH_TOPICS),
+    Stage('visualize', '5DataVisualizationV3.py', 'run_visualization', WITH_TOPICS, PLOT_CUBE),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+# Stages that --stream runs overlapped, as one step
+STREAMED_STAGES = STAGE_NAMES[:3]
+
+def load_stage(filename):
+    """Import a numbered stage script (e.g. 1DataCollectionV3.py) as a module."""
+    return load_module_file('stage_' + os.path.splitext(filename)[0], os.path.join(CODE_DIR, filename))
+
+def file_digest(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def table_digest(name):
+    """Content hash of a stage table's file (Parquet, else the legacy CSV)."""
+    path = stage_table_path(name)
+    return file_digest(path if os.path.exists(path) else stage_table_path(name, 'csv'))
+
+def stage_fingerprint(stage):
+    """Hash of a stage's code (its script and the shared modules) and its input table's content."""
+    code = [file_digest(os.path.join(CODE_DIR, filename)) for filename in [stage.script] + HELPER_MODULES]
+    inputs = table_digest(stage.input_table) if stage.input_table else None
+    return fingerprint(code, inputs)
+
+def load_pipeline_state(path=PIPELINE_STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_pipeline_state(state, path=PIPELINE_STATE_PATH):
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+def reset_peak_memory():
+    """Start measuring a stage's peak memory; returns False where it cannot be measured (off Linux)."""
+    reset_worker_peak()
+    try:
+        # Writing 5 resets the process's VmHWM high-water mark to its current size
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_memory_mb(measured):
+    """Peak resident memory of this process and of its largest pool worker since reset_peak_memory, in MB."""
+    return (status_mb(), worker_peak_mb()) if measured else (None, None)
+
+def select_stages(start=None, only=None):
+    """The stages to run: just `only`, everything from `start` on, or the whole pipeline."""
+    if only:
+        return [STAGES[STAGE_NAMES.index(only)]]
+    return STAGES[STAGE_NAMES.index(start):] if start else list(STAGES)
+
+def _init_stream_worker():
+    load_stage('2TextPreprocessingV3.py').get_engine()
+    load_stage('3SentimentAnalysisV3.py').get_analyzer()
+
+def _put_unless_stopped(pages, item, stop):
+    """Block until the queue has room, giving up if the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _harvest_into(pages, harvest, stop):
+    """Producer thread: put each harvested page on the bounded queue, then None (or the error)."""
+    try:
+        for papers in harvest:
+            if not _put_unless_stopped(pages, papers, stop):
+                return
+        _put_unless_stopped(pages, None, stop)
+    except BaseException as error:
+        _put_unless_stopped(pages, error, stop)
+    finally:
+        harvest.close()
+
+def stream_front_stages(workers=None, queue_pages=4, full=False):
+    """Collect, preprocess and score papers with the compute overlapped with the harvest.
+
+    Returns {table name: DataFrame}, matching a sequential run.
+    """
+    collection = load_stage('1DataCollectionV3.py')
+    preprocessing = load_stage('2TextPreprocessingV3.py')
+    sentiment = load_stage('3SentimentAnalysisV3.py')
+    workers = workers or os.cpu_count()
+    merge = not full and stage_table_exists(RAW_PAPERS)
+    preprocess_cache = PaperCache(PAPER_CACHE_PATH, 'preprocess', preprocessing.preprocessing_fingerprint())
+    sentiment_cache = PaperCache(PAPER_CACHE_PATH, 'sentiment', sentiment.sentiment_fingerprint())
+
+    harvested = []
+    pages = queue.Queue(maxsize=queue_pages)
+    stop = threading.Event()
+    # The pool is started before the harvester thread, so forking never copies a running thread
+    with process_pool(workers, initializer=_init_stream_worker) as pool:
+        pool.submit(len, ()).result()
+        harvester = threading.Thread(
+            target=_harvest_into, daemon=True,
+            args=(pages, collection.iter_arxiv_pages(collection.ARXIV_QUERY, cache_path=collection.HARVEST_CACHE_PATH,
+                                                     incremental=merge), stop))
+        harvester.start()
+        in_flight = deque()
+
+        def finish_oldest():
+            cache, keys, future = in_flight.popleft()
+            results = future.result()
+            if cache is preprocess_cache:
+                rows = list(zip(*results))
+            else:
+                rows = results.tolist()
+            cache.put_many(dict(zip(keys, rows)))
+
+        try:
+            while True:
+                papers = pages.get()
+                if isinstance(papers, BaseException):
+                    raise papers
+                if papers is None:
+                    break
+                harvested.extend(papers)
+                logging.info(f"Harvested {len(harvested)} papers; {len(in_flight)} tasks in flight")
+                for cache, task in ((preprocess_cache, preprocessing._preprocess_chunk),
+                                    (sentiment_cache, sentiment._analyze_chunk)):
+                    keys = [cache.key(paper['title'], paper['abstract']) for paper in papers]
+                    cached = cache.get_many(keys)
+                    missing = [(key, paper) for key, paper in zip(keys, papers) if key not in cached]
+                    if not missing:
+                        continue
+                    titles = [paper['title'] for _, paper in missing]
+                    abstracts = [paper['abstract'] for _, paper in missing]
+                    chunk = (titles, abstracts) if cache is preprocess_cache else abstracts
+                    in_flight.append((cache, [key for key, _ in missing], pool.submit(task, chunk)))
+                while len(in_flight) > 2 * workers:
+                    finish_oldest()
+            while in_flight:
+                finish_oldest()
+        finally:
+            stop.set()
+            harvester.join()
+    preprocess_cache.close()
+    sentiment_cache.close()
+
+    df = collection.deduplicate_papers(pd.DataFrame(harvested))
+    if merge:
+        print(f"Harvested {len(df)} new or updated papers")
+        df = collection.merge_new_papers(df, read_stage_table(RAW_PAPERS))
+    preprocessed = preprocessing.run_preprocessing(df.copy(), workers)
+    return {
+        RAW_PAPERS: df,
+        PREPROCESSED: preprocessed,
+        WITH_SENTIMENT: sentiment.run_sentiment(preprocessed.copy(), workers),
+    }
+
+def run_pipeline(stages=STAGES, force=False, stream=False):
+    """Run stages in order, handing each one's output DataFrame to the next and skipping current ones.
+
+    Returns one (name, status, seconds, peak MB, peak worker MB) report row per stage or streamed group.
+    """
+    state = load_pipeline_state()
+    report = []
+    previous = None  # (table name, DataFrame) written by the stage that just ran
+    if stream and [stage.name for stage in stages[:len(STREAMED_STAGES)]] == STREAMED_STAGES:
+        logging.info(f"[{'+'.join(STREAMED_STAGES)}] streaming")
+        measured = reset_peak_memory()
+        start = perf_counter()
+        outputs = stream_front_stages()
+        for stage in stages[:len(STREAMED_STAGES)]:
+            write_stage_table(outputs[stage.output_table], stage.output_table)
+            state[stage.name] = stage_fingerprint(stage)
+        save_pipeline_state(state)
+        seconds = perf_counter() - start
+        report.append(('+'.join(STREAMED_STAGES), 'streamed', seconds, *peak_memory_mb(measured)))
+        logging.info(f"[{'+'.join(STREAMED_STAGES)}] done in {seconds:.1f}s")
+        previous = (WITH_SENTIMENT, outputs[WITH_SENTIMENT])
+        stages = stages[len(STREAMED_STAGES):]
+    elif stream:
+        logging.info(f"--stream needs the {', '.join(STREAMED_STAGES)} stages selected; running stage by stage")
+    for stage in stages:
+        if stage.input_table and not stage_table_exists(stage.input_table):
+            raise FileNotFoundError(f"{stage.name} needs {stage_table_path(stage.input_table)}; "
+                                    f"run the earlier stages first")
+        key = stage_fingerprint(stage)
+        if (not force and not stage.volatile and state.get(stage.name) == key
+                and stage_table_exists(stage.output_table)):
+            logging.info(f"[{stage.name}] up to date; skipping")
+            report.append((stage.name, 'skipped', 0.0, None, None))
+            previous = None
+            continue
+
+        logging.info(f"[{stage.name}] running {stage.script}")
+        measured = reset_peak_memory()
+        start = perf_counter()
+        entry_point = getattr(load_stage(stage.script), stage.entry_point)
+        if stage.input_table is None:
+            output = entry_point()
+        else:
+            df = (previous[1] if previous and previous[0] == stage.input_table
+                  else read_stage_table(stage.input_table))
+            output = entry_point(df)
+        if output is not None:
+            write_stage_table(output, stage.output_table)
+        seconds = perf_counter() - start
+        peak, worker_peak = peak_memory_mb(measured)
+
+        state[stage.name] = key
+        save_pipeline_state(state)
+        previous = (stage.output_table, output) if output is not None else None
+        report.append((stage.name, 'ran', seconds, peak, worker_peak))
+        logging.info(f"[{stage.name}] done in {seconds:.1f}s")
+    return report
+
+def print_report(report):
+    """Per-stage timing and peak memory; '-' marks a figure that was not measured."""
+    width = max(12, max((len(row[0]) + 2 for row in report), default=0))
+    print(f"{'stage':<{width}}{'status':<9}{'seconds':>9}{'peak MB':>10}{'workers MB':>12}")
+    for name, status, seconds, peak, worker_peak in report:
+        memory = (f"{peak:>10.0f}" if peak is not None else f"{'-':>10}") + \
+                 (f"{worker_peak:>12.0f}" if worker_peak is not None else f"{'-':>12}")
+        print(f"{name:<{width}}{status:<9}{seconds:>9.1f}{memory}")
+    print(f"{'total':<{width + 9}}{sum(row[2] for row in report):>9.1f}")
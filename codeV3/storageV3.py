@@ -0,0 +1,138 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import ast
+import os
+import logging
+
+# Stage hand-off tables, written as <name>.parquet in the working directory
+RAW_PAPERS = 'arxiv_semiconductors'
+PREPROCESSED = 'arxiv_semiconductors_preprocessed'
+WITH_SENTIMENT = 'arxiv_semiconductors_with_sentiment'
+WITH_TOPICS = 'arxiv_semiconductors_with_topics'
+PLOT_CUBE = 'arxiv_semiconductors_plot_cube'
+PLOT_HISTOGRAMS = 'arxiv_semiconductors_plot_histograms'
+
+# Also write a <name>.csv copy of every stage table for spreadsheet users
+WRITE_CSV_COPY = False
+
+FLOAT32_COLUMNS = {'compound_score', 'technical_confidence', 'result_strength', 'citation_impact',
+                   'base_sentiment'}
+CATEGORY_COLUMNS = {'sentiment_category', 'topic_name', 'primary_category'}
+
+# Columns that legacy CSV files hold as stringified Python reprs
+LITERAL_COLUMNS = {'categories', 'authors', 'technical_phrases', 'sentiment_scores'}
+
+def stage_table_path(name, extension='parquet'):
+    return f"{name}.{extension}"
+
+def stage_table_exists(name):
+    return os.path.exists(stage_table_path(name)) or os.path.exists(stage_table_path(name, 'csv'))
+
+def _columnar_dtypes(df):
+    """Store scores as float32 and low-cardinality labels as categoricals."""
+    df = df.copy(deep=False)
+    for column in df.columns:
+        if column in FLOAT32_COLUMNS:
+            df[column] = df[column].astype('float32')
+        elif column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+    return df
+
+def write_stage_table(df, name, csv_copy=None):
+    """Write a stage's output as Parquet, keeping list, struct and categorical columns native."""
+    path = stage_table_path(name)
+    _columnar_dtypes(df).to_parquet(path, index=False)
+    if WRITE_CSV_COPY if csv_copy is None else csv_copy:
+        df.to_csv(stage_table_path(name, 'csv'), index=False)
+    logging.info(f"Saved {len(df)} rows to {path}")
+    return path
+
+def read_stage_table(name, columns=None):
+    """Read a stage table, loading only the requested columns.
+
+    Falls back to a legacy CSV of the same name, parsing its stringified
+    list and dict columns back into Python objects.
+    """
+    path = stage_table_path(name)
+    if os.path.exists(path):
+        return pd.read_parquet(path, columns=columns)
+
+    csv_path = stage_table_path(name, 'csv')
+    logging.info(f"{path} not found; reading legacy {csv_path}")
+    return _parse_literal_columns(pd.read_csv(csv_path, usecols=columns))
+
+def iter_stage_table(name, chunk_size, columns=None):
+    """Yield a stage table as DataFrames of at most chunk_size rows, reading one chunk at a time."""
+    path = stage_table_path(name)
+    if os.path.exists(path):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    csv_path = stage_table_path(name, 'csv')
+    logging.info(f"{path} not found; reading legacy {csv_path}")
+    for df in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_size):
+        yield _parse_literal_columns(df)
+
+def stage_table_schema(name):
+    """Arrow schema of a Parquet stage table, or None for a legacy CSV."""
+    path = stage_table_path(name)
+    return pq.read_schema(path) if os.path.exists(path) else None
+
+def _parse_literal_columns(df):
+    for column in LITERAL_COLUMNS & set(df.columns):
+        df[column] = df[column].map(lambda value: ast.literal_eval(value) if isinstance(value, str) else value)
+    return df
+
+class StageTableWriter:
+    """Write a stage table chunk by chunk, as row groups of one Parquet file.
+
+    The file is written under a temporary name and moved into place on a
+    clean close, so a failed run leaves the previous table untouched.
+    Categorical columns get 32-bit dictionary indices so that chunks with
+    different category sets share one schema. Pass the input table's schema
+    to keep its column types when the first chunk alone cannot show them,
+    e.g. a list column that is empty in every row of that chunk.
+    """
+    def __init__(self, name, csv_copy=None, schema=None):
+        self.path = stage_table_path(name)
+        self.input_schema = schema
+        self.csv_path = stage_table_path(name, 'csv') if (WRITE_CSV_COPY if csv_copy is None else csv_copy) else None
+        self.writer = None
+        self.rows = 0
+
+    def write(self, df):
+        table = pa.Table.from_pandas(_columnar_dtypes(df), preserve_index=False)
+        if self.writer is None:
+            fields = []
+            for field in table.schema:
+                if self.input_schema is not None and field.name in self.input_schema.names:
+                    field = field.with_type(self.input_schema.field(field.name).type)
+                if pa.types.is_dictionary(field.type):
+                    field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+                fields.append(field)
+            schema = pa.schema(fields, metadata=table.schema.metadata)
+            self.writer = pq.ParquetWriter(self.path + '.tmp', schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+        if self.csv_path:
+            df.to_csv(self.csv_path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is None:
+            raise ValueError(f"No rows written to {self.path}")
+        self.writer.close()
+        os.replace(self.path + '.tmp', self.path)
+        logging.info(f"Saved {self.rows} rows to {self.path}")
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        elif self.writer is not None:
+            self.writer.close()
+            os.remove(self.path + '.tmp')